@@ -1,6 +1,27 @@
+import time
+import boto3
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource("dynamodb")
+table = dynamodb.Table("messages")
+
+def mark_session_disconnected(connection_id):
+    """Flag the session so an in-flight on_send_message invocation stops working for it."""
+    try:
+        table.update_item(
+            Key={"connectionId": connection_id},
+            UpdateExpression="SET disconnectedAt = :now",
+            ConditionExpression="attribute_exists(connectionId)",  # don't create orphan rows
+            ExpressionAttributeValues={":now": int(time.time())},
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            print(f"Failed to mark {connection_id} disconnected: {e}")
+
 def lambda_handler(event, context):
     connection_id = event["requestContext"]["connectionId"]
     print(f"Disconnected: {connection_id}")
+    mark_session_disconnected(connection_id)
     return {
         "statusCode": 200,
         "body": "Disconnected"
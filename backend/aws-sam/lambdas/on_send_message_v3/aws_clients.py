@@ -0,0 +1,86 @@
+'''Lazily created, cached boto3 clients and tables shared by the whole Lambda'''
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+import botocore
+from botocore.exceptions import ClientError
+
+REGION = os.getenv("AWS_REGION", "us-east-1")
+BEDROCK_CONFIG = botocore.config.Config(connect_timeout=5, read_timeout=15)
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[Tuple[str, Optional[str], str], Any] = {}
+_tables: Dict[str, Any] = {}
+
+
+def _get_session() -> boto3.session.Session:
+    # One Session for every client: creating clients from the default session
+    # is not thread-safe, and each new Session re-reads config and credentials.
+    global _session #pylint: disable=global-statement
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def client(service: str, endpoint_url: Optional[str] = None,
+           region_name: str = REGION, config: Optional[botocore.config.Config] = None):
+    """Return the cached client for (service, endpoint, region), creating it on first use."""
+    key = (service, endpoint_url, region_name)
+    found = _clients.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _get_session().client(
+                service, endpoint_url=endpoint_url, region_name=region_name, config=config)
+        return _clients[key]
+
+
+def table(name: str):
+    """Return the cached DynamoDB Table resource for `name`."""
+    found = _tables.get(name)
+    if found is not None:
+        return found
+    with _lock:
+        if name not in _tables:
+            _tables[name] = _get_session().resource("dynamodb", region_name=REGION).Table(name)
+        return _tables[name]
+
+
+def bedrock_runtime():
+    """The Bedrock runtime client used for Converse calls."""
+    return client("bedrock-runtime", config=BEDROCK_CONFIG)
+
+
+def apigw(domain: str, stage: str):
+    """API Gateway management client for one WebSocket endpoint."""
+    return client("apigatewaymanagementapi", endpoint_url=f"https://{domain}/{stage}")
+
+
+# What Bedrock answers the warm-up probe's unknown modelId with
+_PROBE_REJECTIONS = {"ValidationException", "ResourceNotFoundException"}
+
+
+def warm_bedrock() -> None:
+    """
+    Open the Bedrock TLS connection (and resolve credentials) ahead of the
+    first real request. bedrock-runtime has no read-only call to make
+    instead, so this sends a Converse that names no real model: it is signed
+    and sent like a real one, but rejected during request validation, so no
+    model runs, nothing is billed and no model quota is used. The pooled
+    connection stays open for reuse. Only that rejection counts as success;
+    any other error (credentials, access, throttling) is reported.
+    """
+    try:
+        bedrock_runtime().converse(
+            modelId="warmup.connection-probe",
+            messages=[{"role": "user", "content": [{"text": "."}]}],
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in _PROBE_REJECTIONS:
+            print(f"Bedrock warm-up failed: {e}")
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"Bedrock warm-up failed: {e}")
@@ -1,13 +1,13 @@
 ''' Refactored DB_Tools to use pydantic'''
 from decimal import Decimal
 from typing import Any, List
-import boto3
 from pydantic import ValidationError
+import aws_clients
 from pydantic_input_comps import ToolResultContentBlock, TextContentBlock
 from pydantic_models import ConverseResponse, Message
 
-dynamodb = boto3.resource("dynamodb")
-messages_table = dynamodb.Table("messages")
+def _messages_table():
+    return aws_clients.table("messages")
 
 def _convert_floats_to_decimals(data: Any) -> Any:
     """Recursively converts all float values in a dictionary or list to Decimal."""
@@ -27,7 +27,7 @@ def append_message_entry_to_db(connection_id: str, message: Message) -> None:
     message_dict = message.model_dump(mode='json')    
     decimal_message = _convert_floats_to_decimals(message_dict)
     try:
-        messages_table.update_item(
+        _messages_table().update_item(
             Key={"connectionId": connection_id},
             UpdateExpression="SET messages = list_append(if_not_exists(messages, :empty), :new)",
             ExpressionAttributeValues={":empty": [], ":new": [decimal_message]},
@@ -75,7 +75,7 @@ def get_session_messages(connection_id: str) -> List[Message]:
     and parses it into a list of Message objects.
     """
     try:
-        resp = messages_table.get_item(Key={"connectionId": connection_id})
+        resp = _messages_table().get_item(Key={"connectionId": connection_id})
         raw_messages: List[dict] = resp.get("Item", {}).get("messages", [])
 
         if not raw_messages:
@@ -91,6 +91,19 @@ def get_session_messages(connection_id: str) -> List[Message]:
         print(f"Error retrieving session messages for {connection_id}: {e}")
         return []
 
+def is_session_disconnected(connection_id: str) -> bool:
+    """True once on_disconnect has flagged the session (disconnectedAt is set)."""
+    try:
+        resp = _messages_table().get_item(
+            Key={"connectionId": connection_id},
+            ProjectionExpression="disconnectedAt",
+            ConsistentRead=True,
+        )
+        return "disconnectedAt" in resp.get("Item", {})
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"Error checking connection state for {connection_id}: {e}")
+        return False  # unknown: keep going rather than drop a live client
+
 def build_history_messages(connection_id: str) -> List[Message]:
     """
     Builds the Pydantic Message history list for the model call.
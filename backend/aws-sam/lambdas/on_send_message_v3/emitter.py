@@ -1,16 +1,47 @@
 """This file manages emmissions to API"""
 import json
-from typing import Any, Literal
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Union
 import boto3
+from botocore.exceptions import ClientError
 from pydantic import BaseModel
 
 class WebSocketPayload(BaseModel):
-    """Model for the data sent over the WebSocket."""
-    type: Literal["bedrock_reply"]
-    reply: str
+    """
+    Model for the data sent over the WebSocket.
+    A message longer than one frame is sent as several frames sharing
+    message_id, numbered by seq from 0; the client joins their `reply`
+    text in seq order once the frame with final=True arrives.
+    Progress events (see EventType) carry their fields in `data` instead.
+    """
+    type: Literal["bedrock_reply", "debug", "turn_started", "model_thinking",
+                  "tool_started", "tool_finished"]
+    reply: str = ""
+    data: Optional[Dict[str, Any]] = None
+    message_id: Optional[str] = None
+    seq: Optional[int] = None
+    final: Optional[bool] = None
 
+EventType = Literal["turn_started", "model_thinking", "tool_started", "tool_finished"]
+
+# UTF-8 bytes of reply text per frame; the rest of API Gateway's 32 KB frame
+# is headroom for the JSON envelope and escaping.
 _MAX_FRAME_BYTES = 28_000
 DEBUG = True
+
+SEND_RETRIES = int(os.getenv("EMIT_SEND_RETRIES", "4"))
+SEND_BACKOFF_SECONDS = float(os.getenv("EMIT_BACKOFF_SECONDS", "0.1"))
+FLUSH_TIMEOUT_SECONDS = float(os.getenv("EMIT_FLUSH_TIMEOUT_SECONDS", "5"))
+LIVENESS_CHECK_SECONDS = float(os.getenv("LIVENESS_CHECK_SECONDS", "2"))
+_THROTTLE_CODES = {"LimitExceededException", "ThrottlingException", "TooManyRequestsException"}
+
+DEBUG_MAX_BYTES = int(os.getenv("DEBUG_MAX_BYTES", "4000"))          # per debug message
+DEBUG_SAMPLE_RATE = float(os.getenv("DEBUG_SAMPLE_RATE", "1.0"))     # fraction of invocations traced
 def _safe_json(obj: Any) -> str:
     """Safely serialize an object to a JSON string."""
     try:
@@ -20,16 +51,83 @@ def _safe_json(obj: Any) -> str:
     except Exception: #pylint: disable=broad-exception-caught
         return str(obj)
 
+def _debug_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_none=True)
+    return str(obj)
+
+def _cap(text: str, max_bytes: int = DEBUG_MAX_BYTES) -> str:
+    """Truncate text to max_bytes of UTF-8, noting how much was cut."""
+    raw = text.encode("utf-8")
+    if len(raw) <= max_bytes:
+        return text
+    kept = next(_utf8_chunks(text, max_bytes))
+    return f"{kept}… [truncated {len(raw) - len(kept.encode('utf-8'))} bytes]"
+
+def _utf8_chunks(text: str, max_bytes: int = _MAX_FRAME_BYTES) -> Iterator[str]:
+    """
+    Split text into pieces of at most max_bytes UTF-8 bytes, never cutting a
+    multi-byte character. Slices a memoryview, so no intermediate copies.
+    """
+    view = memoryview(text.encode("utf-8"))
+    start, total = 0, len(view)
+    while start < total:
+        end = min(start + max_bytes, total)
+        # back off continuation bytes (10xxxxxx) so `end` sits on a character start
+        while end < total and end > start and (view[end] & 0xC0) == 0x80:
+            end -= 1
+        yield str(view[start:end], "utf-8")
+        start = end
+
+def _frames(text: str, kind: str = "bedrock_reply") -> Iterator[WebSocketPayload]:
+    """Frame a message for the socket: one message_id, consecutive seq, last frame final."""
+    message_id = uuid.uuid4().hex[:12]
+    chunks = _utf8_chunks(text)
+    current = next(chunks, "")
+    seq = 0
+    for following in chunks:
+        yield WebSocketPayload(type=kind, reply=current,
+                               message_id=message_id, seq=seq, final=False)
+        current, seq = following, seq + 1
+    yield WebSocketPayload(type=kind, reply=current,
+                           message_id=message_id, seq=seq, final=True)
+
+class _Flush:
+    """Queue marker: set once everything queued before it has been sent."""
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _Stop(_Flush):
+    """Queue marker: like _Flush, and the worker exits after setting it."""
+
+
 class Emitter:
-    """Handles sending messages to the connected client via API Gateway WebSocket."""
+    """
+    Handles sending messages to the connected client via API Gateway WebSocket.
+    Frames are queued and posted in order by one background worker, so callers
+    never wait on API Gateway. Call close() before the handler returns: it
+    delivers what is queued and ends the worker thread, which would otherwise
+    outlive the invocation in a warm container.
+    """
 
-    def __init__(self, apigw: boto3.client, connection_id: str, debug: bool = True):
-        self.debug = debug
+    def __init__(self, apigw: boto3.client, connection_id: str, debug: bool = True,
+                 disconnected_check: Optional[Callable[[], bool]] = None):
+        # Sampled once per invocation so a traced request is traced end to end
+        self.debug = debug and random.random() < DEBUG_SAMPLE_RATE
+        self._last_history_message: Any = None
         self.connection_id = connection_id
         if apigw is None:
             raise ValueError("API Gateway client (apigw)"
                              "must be provided in a non-local environment.")
         self.apigw = apigw
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._gone = False  # client disconnected; drop whatever is still queued
+        self._closed = False
+        self._disconnected_check = disconnected_check
+        self._last_liveness_check = 0.0
 
     def _to_text(self, data: Any) -> str:
         """Extract a readable string from any shape (Pydantic model, dict, list, etc.)."""
@@ -60,23 +158,106 @@ class Emitter:
         return str(data)
 
     def _send_remote(self, payload: WebSocketPayload) -> bool:
-        """Sends payload to the deployed API Gateway WebSocket."""
+        """Sends payload to the deployed API Gateway WebSocket, retrying when throttled."""
         data_bytes = payload.model_dump_json(exclude_none=True).encode("utf-8")
-        try:
-            self.apigw.post_to_connection(
-                ConnectionId=self.connection_id,
-                Data=data_bytes,
-            )
-            return True
-        except Exception as e: #pylint: disable=broad-exception-caught
-            if DEBUG:
-                print(f"Remote emit failed (Connection ID: {self.connection_id}): {e}")
-            return False
+        for attempt in range(SEND_RETRIES + 1):
+            try:
+                self.apigw.post_to_connection(
+                    ConnectionId=self.connection_id,
+                    Data=data_bytes,
+                )
+                return True
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code", "")
+                if code == "GoneException":
+                    self._gone = True
+                elif code in _THROTTLE_CODES and attempt < SEND_RETRIES:
+                    time.sleep(SEND_BACKOFF_SECONDS * (2 ** attempt))
+                    continue
+                if DEBUG:
+                    print(f"Remote emit failed (Connection ID: {self.connection_id}): {e}")
+                return False
+            except Exception as e: #pylint: disable=broad-exception-caught
+                if DEBUG:
+                    print(f"Remote emit failed (Connection ID: {self.connection_id}): {e}")
+                return False
+        return False
+
+    # --- background sender (internal) ---
+    def _run_worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if isinstance(item, _Flush):
+                    item.done.set()
+                    if isinstance(item, _Stop):
+                        return
+                elif not self._gone:
+                    self._send_remote(item)
+            except Exception as e: #pylint: disable=broad-exception-caught
+                print(f"Emitter worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _ensure_worker(self) -> None:
+        """Start the worker if needed (caller holds _worker_lock)."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run_worker,
+                                            name=f"emitter-{self.connection_id}",
+                                            daemon=True)
+            self._worker.start()
 
     # --- shared send (internal) ---
     def _send_payload(self, payload: WebSocketPayload) -> bool:
-        """Send payload via API GW, logging the action."""
-        return self._send_remote(payload)
+        """Queue payload for the background sender; False once the client is gone or closed."""
+        if self._gone:
+            return False
+        with self._worker_lock:  # never queue behind close()'s stop marker
+            if self._closed:
+                return False
+            self._ensure_worker()
+            self._queue.put(payload)
+        return True
+
+    def is_connected(self) -> bool:
+        """
+        False once the client is known to be gone: a send hit GoneException, or
+        `disconnected_check` (polled at most every LIVENESS_CHECK_SECONDS) said so.
+        """
+        if self._gone:
+            return False
+        if self._disconnected_check is not None:
+            now = time.monotonic()
+            if now - self._last_liveness_check >= LIVENESS_CHECK_SECONDS:
+                self._last_liveness_check = now
+                if self._disconnected_check():
+                    self._gone = True
+        return not self._gone
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+        """Block until every frame queued so far is sent (or dropped). False on timeout."""
+        if self._worker is None:
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+        """
+        Flush, then stop the worker thread; later emits are dropped.
+        False if the queue did not drain within timeout.
+        """
+        marker = _Stop()
+        with self._worker_lock:
+            self._closed = True
+            worker = self._worker
+            if worker is None or not worker.is_alive():
+                return True
+            self._queue.put(marker)
+        if not marker.done.wait(timeout):
+            return False
+        worker.join(timeout)
+        return True
 
     # ==========================================================
     # NORMAL EMIT (user-facing, NO persistence)
@@ -95,63 +276,56 @@ class Emitter:
         if DEBUG:
             print(f"[EMIT RAW TEXT - chars]\n{text_str}\n")
 
-        reply_bytes = text_str.encode("utf-8")
-        chunks = []
-        # Handle large messages by splitting into chunks
-        if len(reply_bytes) > _MAX_FRAME_BYTES:
-            start = 0
-            idx = 1
-            total = (len(reply_bytes) + _MAX_FRAME_BYTES - 1) // _MAX_FRAME_BYTES
-            while start < len(reply_bytes):
-                end = min(start + _MAX_FRAME_BYTES, len(reply_bytes))
-                chunk_text = reply_bytes[start:end].decode("utf-8", errors="ignore")
-                # FIX APPLIED HERE for chunked message:
-                chunks.append(
-                    WebSocketPayload(type="bedrock_reply", reply=f"[{idx}/{total}] {chunk_text}")
-                )
-                start = end
-                idx += 1
-        else:
-            # FIX APPLIED HERE for single message:
-            chunks.append(WebSocketPayload(type="bedrock_reply", reply=text_str))
-
         ok_all = True
-        for payload in chunks:
+        for payload in _frames(text_str):
             sent = self._send_payload(payload)
             ok_all = ok_all and sent
         return ok_all
 
+    # ==========================================================
+    # PROGRESS EVENTS (typed, small, single frame)
+    # ==========================================================
+    def emit_event(self, kind: EventType, **data: Any) -> bool:
+        """Emit a typed progress event; `ts_ms` (server epoch millis) is added for client timing."""
+        data["ts_ms"] = int(time.time() * 1000)
+        return self._send_payload(WebSocketPayload(type=kind, data=data))
+
     # ==========================================================
     # DEBUG EMIT (identical WS shape, no DB save)
     # ==========================================================
-    def debug_emit(self, label: str, data: Any) -> None:
-        """Emit debug info to the chat."""
+    def debug_emit(self, label: str, data: Union[Any, Callable[[], Any]]) -> None:
+        """
+        Emit debug info as a "debug" frame (kept out of the chat transcript).
+        `data` may be a zero-argument callable; it is only evaluated and
+        serialized when debugging is enabled. Output is capped at DEBUG_MAX_BYTES.
+        """
         if not self.debug:
             return
         try:
-            serialized_data = json.dumps(data, indent=2, default=str)
-            text = f" {label}:\n" + serialized_data
+            if callable(data):
+                data = data()
+            serialized_data = json.dumps(data, ensure_ascii=False, separators=(",", ":"),
+                                         default=_debug_default)
         except Exception: #pylint: disable=broad-exception-caught
-            text = f" {label}:\n" + str(data)
+            serialized_data = str(data)
+        text = _cap(f" {label}:\n" + serialized_data)
 
         if DEBUG:
             print(f"\n Log: {text}\n")
-        reply_bytes = text.encode("utf-8")
-        chunks = []
-        if len(reply_bytes) > _MAX_FRAME_BYTES:
-            start = 0
-            idx = 1
-            total = (len(reply_bytes) + _MAX_FRAME_BYTES - 1) // _MAX_FRAME_BYTES
-            while start < len(reply_bytes):
-                end = min(start + _MAX_FRAME_BYTES, len(reply_bytes))
-                chunk_text = reply_bytes[start:end].decode("utf-8", errors="ignore")
-                chunks.append(
-                    WebSocketPayload(type="bedrock_reply", reply=f"[{idx}/{total}] {chunk_text}")
-                )
-                start = end
-                idx += 1
-        else:
-            chunks.append(WebSocketPayload(type="bedrock_reply", reply=text))
-
-        for payload in chunks:
+        for payload in _frames(text, kind="debug"):
             self._send_payload(payload)
+
+    def debug_history(self, label: str, history: List[Any]) -> None:
+        """Debug-emit only the messages appended since the last call (all of them if pruned away)."""
+        if not self.debug:
+            return
+        start = 0
+        for idx in range(len(history) - 1, -1, -1):
+            if history[idx] is self._last_history_message:
+                start = idx + 1
+                break
+        delta = history[start:]
+        if history:
+            self._last_history_message = history[-1]
+        if delta or start == 0:
+            self.debug_emit(f"{label} (+{len(delta)} of {len(history)} messages)", delta)
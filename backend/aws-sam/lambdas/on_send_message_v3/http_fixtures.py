@@ -0,0 +1,139 @@
+"""Record/replay transport for upstream_http, for offline tool benchmarking.
+
+Recording wraps the real network transport and writes one JSON fixture per
+request (status, headers, body and the observed latency). Replaying serves
+those fixtures without network access, optionally sleeping for the recorded
+latency so timings stay comparable between runs.
+
+Enable from the environment with install_from_env():
+    HTTP_FIXTURE_MODE     record | replay        (unset = live network)
+    HTTP_FIXTURE_DIR      directory for fixture files
+    HTTP_FIXTURE_LATENCY  1 to replay with recorded latency (default 0)
+    HTTP_FIXTURE_SPEED    latency multiplier when replaying (default 1.0)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import upstream_http
+
+# Query parameters that must never be written to disk (Google API key / engine id)
+_SECRET_PARAMS = {"key", "cx", "api_key", "apikey", "token"}
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "testin", "fixtures")
+
+
+class FixtureMissing(requests.ConnectionError):
+    """No recording exists for a URL requested during replay."""
+
+
+def _redact(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, "REDACTED" if k.lower() in _SECRET_PARAMS else v)
+             for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def fixture_name(url: str) -> str:
+    """Stable file name for a (redacted) URL: host + short hash."""
+    redacted = _redact(url)
+    host = urlsplit(redacted).hostname or "unknown"
+    digest = hashlib.sha1(redacted.encode("utf-8")).hexdigest()[:16]
+    return f"{host}_{digest}.json"
+
+
+def _build_response(url: str, fixture: Dict[str, Any]) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = int(fixture["status"])
+    resp.headers = CaseInsensitiveDict(fixture.get("headers") or {})
+    resp._content = fixture.get("body", "").encode(fixture.get("encoding") or "utf-8") #pylint: disable=protected-access
+    resp.encoding = fixture.get("encoding") or "utf-8"
+    resp.url = url
+    resp.reason = fixture.get("reason", "")
+    return resp
+
+
+class Recorder:
+    """Transport that performs real requests and saves each response as a fixture."""
+
+    def __init__(self, fixture_dir: str = DEFAULT_FIXTURE_DIR,
+                 inner: Optional[upstream_http.Transport] = None):
+        self.fixture_dir = fixture_dir
+        self.inner = inner or upstream_http.network_transport()
+        self._lock = threading.Lock()
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def __call__(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        started = time.monotonic()
+        resp = self.inner(url, timeout=timeout, **kwargs)
+        latency = time.monotonic() - started
+        fixture = {
+            "url": _redact(url),
+            "status": resp.status_code,
+            "reason": resp.reason,
+            # Body is stored decoded, so only Content-Type is worth keeping
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() == "content-type"},
+            "encoding": resp.encoding or "utf-8",
+            "body": resp.text,
+            "latency_seconds": round(latency, 4),
+        }
+        path = os.path.join(self.fixture_dir, fixture_name(url))
+        with self._lock, open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=2, ensure_ascii=False)
+        return resp
+
+
+class Replayer:
+    """Transport that answers from recorded fixtures, never touching the network."""
+
+    def __init__(self, fixture_dir: str = DEFAULT_FIXTURE_DIR,
+                 with_latency: bool = False, speed: float = 1.0):
+        self.fixture_dir = fixture_dir
+        self.with_latency = with_latency
+        self.speed = speed
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self, url: str) -> Dict[str, Any]:
+        name = fixture_name(url)
+        fixture = self._cache.get(name)
+        if fixture is None:
+            path = os.path.join(self.fixture_dir, name)
+            if not os.path.exists(path):
+                raise FixtureMissing(f"No fixture for {_redact(url)} ({name})")
+            with open(path, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+            self._cache[name] = fixture
+        return fixture
+
+    def __call__(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        fixture = self._load(url)
+        if self.with_latency:
+            delay = float(fixture.get("latency_seconds", 0)) * self.speed
+            if delay > timeout:
+                time.sleep(timeout)
+                raise requests.Timeout(f"Replayed latency {delay:.2f}s exceeds timeout {timeout}s")
+            time.sleep(delay)
+        return _build_response(url, fixture)
+
+
+def install_from_env() -> Optional[str]:
+    """Install a recorder or replayer according to HTTP_FIXTURE_* env vars. Returns the mode."""
+    mode = (os.getenv("HTTP_FIXTURE_MODE") or "").strip().lower()
+    fixture_dir = os.getenv("HTTP_FIXTURE_DIR") or DEFAULT_FIXTURE_DIR
+    if mode == "record":
+        upstream_http.set_transport(Recorder(fixture_dir))
+    elif mode == "replay":
+        upstream_http.set_transport(Replayer(
+            fixture_dir,
+            with_latency=os.getenv("HTTP_FIXTURE_LATENCY", "0") == "1",
+            speed=float(os.getenv("HTTP_FIXTURE_SPEED", "1.0")),
+        ))
+    else:
+        return None
+    return mode
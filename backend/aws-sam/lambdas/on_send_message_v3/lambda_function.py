@@ -1,14 +1,25 @@
 """Main running portion"""
 import os
 import json
-import boto3
 
+import aws_clients
+import warmup
 from db_tools_v2 import save_user_message
 from bedrock_caller_v2 import call_orchestrator
 
-debug = True
+# Runs during the Lambda init phase, so the first user message doesn't pay for it
+if os.getenv("AWS_LAMBDA_FUNCTION_NAME") and os.getenv("WARM_ON_INIT", "1") == "1":
+    warmup.prime()
+
+# Debug frames are off unless DEBUG_EMIT=1; "toggleDebug" flips it for this container
+debug = os.getenv("DEBUG_EMIT", "0") == "1"
 def lambda_handler(event, context): #pylint: disable=unused-argument
     """Main Entry Point from AWS"""
+    global debug #pylint: disable=global-statement
+    # Scheduled / direct invocation: {"action": "warmup"} (no WebSocket context)
+    if event.get("action") == "warmup":
+        return {"statusCode": 200, "body": json.dumps(warmup.prime())}
+
     connection_id = event["requestContext"]["connectionId"]
     domain = event["requestContext"]["domainName"]
     stage = event["requestContext"]["stage"]
@@ -27,13 +38,12 @@ def lambda_handler(event, context): #pylint: disable=unused-argument
         else:
             save_user_message( connection_id, "(connected)")
 
-        apigw = boto3.client(
-            "apigatewaymanagementapi",
-            endpoint_url=f"https://{domain}/{stage}",
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-        )
+        apigw = aws_clients.apigw(domain, stage)
         call_orchestrator(connection_id, apigw, debug)
 
+    elif (action == "warmup"):
+        warmup.prime()
+
     elif (action == "toggleDebug"):
         debug = not debug
     
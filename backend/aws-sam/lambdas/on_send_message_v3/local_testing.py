@@ -7,6 +7,7 @@ os.environ["AWS_REGION"] = "us-east-1"
 os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
 from db_tools_v2 import save_user_message #pylint: disable=wrong-import-position
 from bedrock_caller_v2 import call_orchestrator #pylint: disable=wrong-import-position
+from http_fixtures import install_from_env #pylint: disable=wrong-import-position
 
 def generate_random_string(length: int = 10) -> str:
     """Generates a random token for connecting to dynamodb"""
@@ -20,6 +21,9 @@ def generate_random_string(length: int = 10) -> str:
 # ==========================
 if __name__ == "__main__":
     TEST_CONNECTION_ID = generate_random_string()
+    FIXTURE_MODE = install_from_env() # HTTP_FIXTURE_MODE=record|replay for offline tool calls
+    if FIXTURE_MODE:
+        print(f"Upstream HTTP fixtures: {FIXTURE_MODE}")
     class DummyApiGw:
         """Dummy object for reqs, note (not my decision of var names)""" 
         def post_to_connection(self, ConnectionId, Data): #pylint: disable=invalid-name 
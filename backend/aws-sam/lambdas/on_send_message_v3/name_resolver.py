@@ -0,0 +1,253 @@
+"""Resolves the make/model names the model writes ("Chevy", "CR V", "F150") to the dataset's names.
+
+Names are compared as compact keys (upper-case, letters and digits only), so
+"CR V", "cr-v" and "CRV" are the same key. A key that is not known exactly
+falls back to a trigram index: candidates sharing the most trigrams are scored
+with the Dice coefficient, and short typos ("TOYTA") that Dice under-rates
+are accepted within a small edit distance. Makes come from the vehicle
+snapshot's dictionary plus its alias table; models are indexed per make.
+
+Models are rewritten more cautiously than makes: only on an exact key or a
+true typo, never to a shorter name the input merely extends ("EXPLORER ST"
+keeps its trim), and never to the dataset's combined names ("GOLF/GTI"),
+which the NHTSA URLs cannot carry in a path segment.
+"""
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MIN_SIMILARITY = 0.6  # Dice over trigrams; "CHEVROLT" vs "CHEVROLET" is ~0.78
+CANDIDATES = 16       # trigram-ranked names checked with Dice / edit distance
+MIN_PREFIX = 4        # "MERCEDES" may stand for "MERCEDES-BENZ" if no other make starts so
+MIN_TYPO_KEY = 4      # "IS", "GS", "918" are real names, one edit from "IS F", "GS F", "911"
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+
+
+def compact(name: Any) -> str:
+    """Upper-case letters and digits only: "CR-V" → "CRV"."""
+    return _NON_ALNUM.sub("", str(name or "").upper())
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting a swap of neighbours as one ("ROUGE" → "ROGUE"), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _typo_limit(key: str) -> int:
+    return 1 if len(key) < 8 else 2
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"^{key}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramIndex:
+    """Exact and fuzzy lookup of display names by compact key."""
+
+    def __init__(self, names: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self._exact: Dict[str, str] = {}
+        for name in sorted(set(names), key=len):  # shortest spelling wins a shared key
+            self._exact.setdefault(compact(name), " ".join(name.split()))
+        for alias, name in (aliases or {}).items():
+            if compact(name) in self._exact:
+                self._exact.setdefault(compact(alias), self._exact[compact(name)])
+        self._keys = list(self._exact)
+        self._grams = [set(_trigrams(k)) for k in self._keys]
+        self._postings: Dict[str, List[int]] = {}
+        for i, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    def exact(self, name: str) -> Optional[str]:
+        """Display name with the same compact key, if any."""
+        return self._exact.get(compact(name))
+
+    def prefixed(self, name: str) -> Optional[str]:
+        """
+        Shortest name whose key starts with this one, if every other match
+        extends it ("MERCEDES" → "MERCEDES-BENZ"; "MODEL" is ambiguous: "MODEL 3", "MODEL S").
+        """
+        key = compact(name)
+        if len(key) < MIN_PREFIX:
+            return None
+        matches = sorted((k for k in self._keys if k.startswith(key)), key=len)
+        if not matches or not all(k.startswith(matches[0]) for k in matches):
+            return None
+        return self._exact[matches[0]]
+
+    def fuzzy(self, name: str) -> Optional[Tuple[str, float]]:
+        """Closest name by trigram Dice similarity or a one/two-letter typo, with its score; None if tied."""
+        key = compact(name)
+        grams = set(_trigrams(key))
+        shared = Counter(i for gram in grams for i in self._postings.get(gram, ()))
+        best: Optional[Tuple[str, float]] = None
+        tied = False
+        for i, common in shared.most_common(CANDIDATES):
+            score = 2.0 * common / (len(grams) + len(self._grams[i]))
+            if score < MIN_SIMILARITY:
+                limit = _typo_limit(key)
+                if _edit_distance(key, self._keys[i], limit) > limit:
+                    continue
+                score = MIN_SIMILARITY  # a typo counts as just good enough
+            if best is None or score > best[1]:
+                best, tied = (self._exact[self._keys[i]], score), False
+            elif score == best[1]:
+                tied = True
+        return None if tied else best  # "MODEL" is as close to "MODEL 3" as to "MODEL S"
+
+    def typo(self, name: str) -> Optional[str]:
+        """
+        Closest name within a one/two-letter typo; None if tied or the key is
+        shorter than MIN_TYPO_KEY. Names this one extends or is extended by are
+        not typos ("EXPLORER ST" of "EXPLORER", "IS" of "IS F").
+        """
+        key = compact(name)
+        if len(key) < MIN_TYPO_KEY:
+            return None
+        limit = _typo_limit(key)
+        shared = Counter(i for gram in set(_trigrams(key)) for i in self._postings.get(gram, ()))
+        best: Optional[str] = None
+        best_distance = limit + 1
+        tied = False
+        for i, _ in shared.most_common(CANDIDATES):
+            other = self._keys[i]
+            if key.startswith(other) or other.startswith(key):
+                continue
+            distance = _edit_distance(key, other, limit)
+            if distance < best_distance:
+                best, best_distance, tied = self._exact[other], distance, False
+            elif distance == best_distance and best is not None:
+                tied = True
+        return None if tied else best
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Exact, then fuzzy, then unique-prefix match; None when nothing is close."""
+        found = self.exact(name)
+        if found:
+            return found
+        close = self.fuzzy(name)
+        if close:
+            return close[0]
+        return self.prefixed(name)
+
+
+class _Index:
+    """Make index plus one model index per make, built from the vehicle snapshot."""
+
+    def __init__(self):
+        from vehicle_snapshot import open_snapshot #pylint: disable=import-outside-toplevel
+        import numpy as np #pylint: disable=import-outside-toplevel
+        snapshot = open_snapshot()
+        makes = snapshot.dictionary("MAKE")
+        models = snapshot.dictionary("MODEL")
+        self.makes = TrigramIndex(makes, snapshot.header.get("make_aliases"))
+
+        pairs = np.unique(snapshot.column("MAKE").astype(np.int64) * len(models)
+                          + snapshot.column("MODEL").astype(np.int64))
+        per_make: Dict[str, List[str]] = {}
+        for pair in pairs.tolist():
+            model = models[pair % len(models)]
+            if "/" not in model:  # "GOLF/GTI", "A4/S4": not valid as a URL path segment
+                per_make.setdefault(makes[pair // len(models)], []).append(model)
+        self._model_names = per_make
+        self._models: Dict[str, TrigramIndex] = {}
+
+    def models(self, make: str) -> Optional[TrigramIndex]:
+        """Model index for a canonical make (built on first use)."""
+        index = self._models.get(make)
+        if index is None and make in self._model_names:
+            index = self._models.setdefault(make, TrigramIndex(self._model_names[make]))
+        return index
+
+
+_index: Optional[_Index] = None
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def _get_index() -> Optional[_Index]:
+    global _index, _index_failed #pylint: disable=global-statement
+    if _index is None and not _index_failed:
+        with _index_lock:
+            if _index is None and not _index_failed:
+                try:
+                    _index = _Index()
+                except (OSError, ValueError) as e:
+                    print(f"Name resolver disabled: {e}")
+                    _index_failed = True
+    return _index
+
+
+def prime() -> None:
+    """Build the make index ahead of the first tool call (called by warmup)."""
+    _get_index()
+
+
+def resolve_make(make: str) -> Optional[str]:
+    """Dataset spelling of a make, or None if nothing is close."""
+    index = _get_index()
+    return index.makes.resolve(make) if index and make else None
+
+
+def dataset_make(make: str) -> Optional[str]:
+    """Dataset name of a make or one of its aliases ("ALFA" -> "ALFA ROMEO"); no fuzzy matching."""
+    index = _get_index()
+    return index.makes.exact(make) if index and make else None
+
+
+def resolve_model(make: str, model: str) -> Optional[str]:
+    """Dataset spelling of a model of `make` (already canonical): exact key or typo only, else None."""
+    index = _get_index()
+    models = index.models(make) if index and make and model else None
+    return (models.exact(model) or models.typo(model)) if models else None
+
+
+def _differs(given: str, canonical: str) -> bool:
+    return " ".join(given.upper().split()) != canonical.upper()
+
+
+def resolve_input(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a tool input with "make", "makes" and "model" rewritten to dataset
+    names. Values that differ from the dataset name only in letter case, or
+    that match nothing, are left exactly as given.
+    """
+    if not isinstance(tool_input, dict) or not (
+            tool_input.get("make") or tool_input.get("makes") or tool_input.get("model")):
+        return tool_input
+    resolved = dict(tool_input)
+
+    make = tool_input.get("make")
+    canonical_make = resolve_make(make) if isinstance(make, str) else None
+    if canonical_make and _differs(make, canonical_make):
+        resolved["make"] = canonical_make
+
+    if isinstance(tool_input.get("makes"), list):
+        resolved["makes"] = [(resolve_make(m) or m) if isinstance(m, str) else m
+                             for m in tool_input["makes"]]
+
+    model = tool_input.get("model")
+    if canonical_make and isinstance(model, str):
+        canonical_model = resolve_model(canonical_make, model)
+        if canonical_model and _differs(model, canonical_model):
+            resolved["model"] = canonical_model
+
+    if resolved != tool_input:
+        print(f"Resolved names: {tool_input} -> {resolved}")
+    return resolved
@@ -0,0 +1,22 @@
+"""Key text of the nhtsa_data table, shared by its reader and its loader.
+
+nhtsa_table.py (reads) and backend/data/load_nhtsa_table.py (writes) both
+import this module, so a name is spelled the same in a stored key and in a
+query: upper-cased, whitespace collapsed ("Civic  Hatchback" -> "CIVIC HATCHBACK").
+Makes are folded to their full name before this (vehicle_values.canonical_make
+in the loader, the snapshot's alias table in the Lambda).
+"""
+from typing import Any
+
+# Attributes used as table / index keys or in key-side filters; stored as key_text()
+KEY_ATTRIBUTES = ("MAKE", "MODEL", "MODEL_YR", "VEHICLE_TYPE")
+
+
+def key_text(value: Any) -> str:
+    """Upper-cased, whitespace-collapsed text of a key attribute."""
+    return " ".join(str(value if value is not None else "").split()).upper()
+
+
+def partition_key(make: Any, model: Any) -> str:
+    """PK of a row: MAKE#MODEL."""
+    return f"{key_text(make)}#{key_text(model)}"
@@ -0,0 +1,229 @@
+"""Read access to the nhtsa_data table through its secondary indexes.
+
+find_vehicles() turns a filter set (make, model, years, vehicle types) into
+a query plan: the index whose partition key pins down the most, one Query per
+partition, and a FilterExpression for whatever the key cannot express. The
+partitions are queried concurrently, each one paginated to the end, with only
+the requested attributes projected. Results are cached in-process.
+
+Names are compared as nhtsa_keys.key_text(), the same normalizer the loader
+writes keys with; makes are first folded to their dataset name ("ALFA" ->
+"ALFA ROMEO").
+
+Index choice:
+    make + model        → base table, PK = MAKE#MODEL
+    make (+ years)      → GSI_MakeYear, one MAKE partition, MODEL_YR as range key
+    years (+ types)     → GSI_Year or GSI_VehicleType, whichever needs fewer partitions
+    vehicle types only  → GSI_VehicleType
+A model without a make rides along as a filter on the year / type indexes.
+A query with none of these would need a Scan and is refused.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import aws_clients
+import name_resolver
+from nhtsa_keys import key_text, partition_key
+
+NHTSA_TABLE = os.getenv("NHTSA_TABLE", "nhtsa_data")
+QUERY_WORKERS = int(os.getenv("NHTSA_QUERY_WORKERS", "4"))
+CACHE_TTL_SECONDS = int(os.getenv("NHTSA_CACHE_TTL_SECONDS", "3600"))  # the table changes a few times a year
+CACHE_MAX_ENTRIES = int(os.getenv("NHTSA_CACHE_MAX_ENTRIES", "256"))
+
+ATTRIBUTES = ("MAKE", "MODEL", "MODEL_YR", "BODY_STYLE", "VEHICLE_TYPE",
+              "DRIVE_TRAIN", "NUM_OF_SEATING", "OVERALL_STARS")
+
+Row = Dict[str, str]
+_Years = Union[int, str, Iterable[Union[int, str]], None]
+
+
+class QueryPlan(NamedTuple):
+    """Where and how to read: one Query per entry of `partitions`."""
+    index: Optional[str]                 # None = base table
+    partitions: Tuple[Tuple[str, str, str, Optional[str]], ...]  # (hash attr, value, range attr, range cond)
+    filters: Tuple[Tuple[str, Tuple[str, ...]], ...]            # attr IN values, applied server-side
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# PLANNING
+# ────────────────────────────────────────────────────────────────────────────────
+def _as_set(values) -> Tuple[str, ...]:
+    if values is None:
+        return ()
+    if isinstance(values, (str, int)):
+        values = [values]
+    return tuple(sorted({key_text(v) for v in values if str(v).strip()}))
+
+
+def _make_key(make: str) -> str:
+    return key_text(name_resolver.dataset_make(make) or make)
+
+
+def _year_condition(years: Sequence[str]) -> Optional[str]:
+    """Range-key condition covering `years` in one Query, if they are contiguous."""
+    if len(years) == 1:
+        return f"= {years[0]}"
+    numbers = sorted(int(y) for y in years)
+    if numbers == list(range(numbers[0], numbers[-1] + 1)):
+        return f"BETWEEN {numbers[0]} AND {numbers[-1]}"  # 4-digit years sort as strings too
+    return None
+
+
+def plan(make: Optional[str] = None, model: Optional[str] = None, years: _Years = None,
+         vehicle_types: Union[str, Iterable[str], None] = None) -> QueryPlan:
+    """Pick the index and partitions for a filter set (raises ValueError if only a Scan would do)."""
+    year_set = _as_set(years)
+    if not all(y.isdigit() for y in year_set):
+        raise ValueError(f"Model years must be numeric: {list(year_set)}")
+    type_set = _as_set(vehicle_types)
+    make = _make_key(make) if make else None
+    model = key_text(model) if model else None
+    type_filter = (("VEHICLE_TYPE", type_set),) if type_set else ()
+    year_filter = (("MODEL_YR", year_set),) if year_set else ()
+    model_filter = (("MODEL", (model,)),) if model else ()  # without a make, the key can't hold it
+
+    if make and model:
+        # SK starts with MODEL_YR, so a single year narrows the key range too
+        cond = f"begins_with {year_set[0]}#" if len(year_set) == 1 else None
+        filters = type_filter + (year_filter if len(year_set) > 1 else ())
+        return QueryPlan(None, (("PK", partition_key(make, model), "SK", cond),), filters)
+
+    if make:
+        if not year_set:
+            return QueryPlan("GSI_MakeYear", (("MAKE", make, "MODEL_YR", None),), type_filter)
+        cond = _year_condition(year_set)
+        if cond:
+            return QueryPlan("GSI_MakeYear", (("MAKE", make, "MODEL_YR", cond),), type_filter)
+        parts = tuple(("MAKE", make, "MODEL_YR", f"= {y}") for y in year_set)
+        return QueryPlan("GSI_MakeYear", parts, type_filter)
+
+    if year_set and (not type_set or len(year_set) <= len(type_set)):
+        parts = tuple(("MODEL_YR", y, "PK", None) for y in year_set)
+        return QueryPlan("GSI_Year", parts, model_filter + type_filter)
+    if type_set:
+        parts = tuple(("VEHICLE_TYPE", t, "PK", None) for t in type_set)
+        return QueryPlan("GSI_VehicleType", parts, model_filter + year_filter)
+
+    raise ValueError("find_vehicles needs a make, a model year or a vehicle type")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# EXECUTION
+# ────────────────────────────────────────────────────────────────────────────────
+def _query_kwargs(query_plan: QueryPlan, partition, attributes: Sequence[str]) -> Dict[str, Any]:
+    hash_attr, hash_value, range_attr, range_cond = partition
+    names = {"#h": hash_attr}
+    values = {":h": {"S": hash_value}}
+    key_expr = "#h = :h"
+    if range_cond:
+        names["#r"] = range_attr
+        op, _, operand = range_cond.partition(" ")
+        if op == "begins_with":
+            values[":r"] = {"S": operand}
+            key_expr += " AND begins_with(#r, :r)"
+        elif op == "BETWEEN":
+            low, _, high = operand.partition(" AND ")
+            values.update({":r1": {"S": low}, ":r2": {"S": high}})
+            key_expr += " AND #r BETWEEN :r1 AND :r2"
+        else:
+            values[":r"] = {"S": operand}
+            key_expr += " AND #r = :r"
+
+    filter_parts = []
+    for n, (attr, allowed) in enumerate(query_plan.filters):
+        names[f"#f{n}"] = attr
+        placeholders = []
+        for m, value in enumerate(allowed):
+            values[f":f{n}_{m}"] = {"S": value}
+            placeholders.append(f":f{n}_{m}")
+        filter_parts.append(f"#f{n} IN ({', '.join(placeholders)})")
+
+    projection = []
+    for n, attr in enumerate(attributes):
+        names[f"#p{n}"] = attr
+        projection.append(f"#p{n}")
+
+    kwargs = {
+        "TableName": NHTSA_TABLE,
+        "KeyConditionExpression": key_expr,
+        "ProjectionExpression": ", ".join(projection),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+    if query_plan.index:
+        kwargs["IndexName"] = query_plan.index
+    if filter_parts:
+        kwargs["FilterExpression"] = " AND ".join(filter_parts)
+    return kwargs
+
+
+def _query_partition(kwargs: Dict[str, Any]) -> List[Row]:
+    dynamodb = aws_clients.client("dynamodb")
+    rows: List[Row] = []
+    while True:
+        page = dynamodb.query(**kwargs)
+        rows.extend({k: v.get("S", "") for k, v in item.items()} for item in page.get("Items", []))
+        if "LastEvaluatedKey" not in page:
+            return rows
+        kwargs = {**kwargs, "ExclusiveStartKey": page["LastEvaluatedKey"]}
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor #pylint: disable=global-statement
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS,
+                                               thread_name_prefix="nhtsa-query")
+    return _executor
+
+
+def run(query_plan: QueryPlan, attributes: Sequence[str] = ATTRIBUTES) -> List[Row]:
+    """Execute a plan: partitions in parallel, each paginated; rows in partition order."""
+    requests = [_query_kwargs(query_plan, p, attributes) for p in query_plan.partitions]
+    if len(requests) == 1:
+        return _query_partition(requests[0])
+    rows: List[Row] = []
+    for part in _pool().map(_query_partition, requests):
+        rows.extend(part)
+    return rows
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# CACHE + PUBLIC API
+# ────────────────────────────────────────────────────────────────────────────────
+_cache: "OrderedDict[Tuple[QueryPlan, Tuple[str, ...]], Tuple[float, List[Row]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def find_vehicles(make: Optional[str] = None, model: Optional[str] = None, years: _Years = None,
+                  vehicle_types: Union[str, Iterable[str], None] = None,
+                  attributes: Sequence[str] = ATTRIBUTES) -> List[Row]:
+    """
+    Rows of nhtsa_data matching every given filter (names compared as key_text).
+    Only `attributes` are read; absent attributes are left out of a row.
+    """
+    query_plan = plan(make, model, years, vehicle_types)
+    key = (query_plan, tuple(attributes))
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            _cache.move_to_end(key)
+            return list(hit[1])
+
+    rows = run(query_plan, attributes)
+    with _cache_lock:
+        _cache[key] = (now + CACHE_TTL_SECONDS, rows)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return list(rows)
@@ -0,0 +1,174 @@
+"""Caps oversized tool payloads before they reach the summarizer and history.
+
+The largest list of row dicts in a JSON tool result (models, rating rows)
+is collapsed (rows identical apart from their id/description merge into
+one). Only if it is still over the token budget are rows ranked by
+relevance to the conversation and the least relevant dropped; the rows
+that survive keep the tool's order. The payload records how many rows were
+omitted.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic_input_comps import JsonContent, ToolResult
+from pydantic_models import Message, TextContentBlock, ToolResultContentBlock
+
+TOOL_RESULT_MAX_TOKENS = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "600"))
+CHARS_PER_TOKEN = 4  # rough, but consistent; we only need relative sizes
+CONTEXT_MESSAGES = 6  # recent user messages mined for relevance terms
+
+# Fields that differ between otherwise identical rows (ids, free-text labels)
+_IDENTITY_FIELDS = {"VehicleId", "VehicleDescription", "Model_ID", "vehicle_id"}
+
+# User wording → words that appear in NHTSA descriptions / body styles
+_BODY_SYNONYMS = {
+    "sedan": {"sedan", "4 dr", "4dr"},
+    "hatchback": {"hatchback", "5 hb", "hb"},
+    "suv": {"suv", "sport utility"},
+    "truck": {"pickup", "pu", "truck", "cab"},
+    "pickup": {"pickup", "pu", "truck", "cab"},
+    "van": {"van", "minivan"},
+    "minivan": {"van", "minivan"},
+    "awd": {"awd", "4wd", "4x4"},
+    "4wd": {"4wd", "4x4", "awd"},
+    "fwd": {"fwd"},
+    "rwd": {"rwd"},
+    "coupe": {"coupe", "2 dr", "2dr"},
+}
+
+_STOPWORDS = {
+    "the", "a", "an", "and", "or", "for", "of", "to", "in", "on", "is", "it", "me",
+    "my", "i", "what", "which", "with", "about", "car", "cars", "vehicle", "best",
+    "good", "show", "tell", "find", "some", "any", "are", "how", "that", "this",
+}
+
+
+def estimate_tokens(data: Any) -> int:
+    """Approximate token count of a JSON-serializable value."""
+    return len(json.dumps(data, separators=(",", ":"), default=str)) // CHARS_PER_TOKEN + 1
+
+
+def conversation_terms(history: List[Message]) -> Set[str]:
+    """Lower-cased words (and body-type synonyms) from the most recent user messages."""
+    terms: Set[str] = set()
+    seen = 0
+    for message in reversed(history):
+        if message.role != "user":
+            continue
+        texts = [b.text for b in message.content if isinstance(b, TextContentBlock)]
+        if not texts:
+            continue  # tool-result turns carry no user wording
+        for word in re.findall(r"[a-z0-9][a-z0-9\-]*", " ".join(texts).lower()):
+            if word in _STOPWORDS or len(word) < 2:
+                continue
+            terms.add(word)
+            terms.update(_BODY_SYNONYMS.get(word, ()))
+        seen += 1
+        if seen >= CONTEXT_MESSAGES:
+            break
+    return terms
+
+
+def _row_text(row: Dict[str, Any]) -> str:
+    return " ".join(str(v) for v in row.values() if v is not None).lower()
+
+
+def _relevance(row: Dict[str, Any], terms: Set[str]) -> int:
+    if not terms:
+        return 0
+    text = _row_text(row)
+    words = set(re.findall(r"[a-z0-9][a-z0-9\-]*", text))
+    score = len(words & terms)
+    # multi-word synonyms such as "sport utility" / "4 dr"
+    score += sum(1 for t in terms if " " in t and t in text)
+    return score
+
+
+def collapse_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge rows that match on every non-identity field, keeping first-seen order."""
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(sorted((k, json.dumps(v, default=str)) for k, v in row.items()
+                           if k not in _IDENTITY_FIELDS))
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(row)
+            continue
+        desc = row.get("VehicleDescription")
+        if desc and desc not in str(existing.get("VehicleDescription", "")):
+            existing["VehicleDescription"] = f"{existing.get('VehicleDescription', '')}; {desc}"
+        existing["variants"] = existing.get("variants", 1) + 1
+        existing.pop("VehicleId", None)
+    return list(merged.values())
+
+
+def _largest_row_list(payload: Dict[str, Any]) -> Optional[str]:
+    best, best_len = None, 0
+    for key, value in payload.items():
+        if isinstance(value, list) and value and all(isinstance(r, dict) for r in value):
+            if len(value) > best_len:
+                best, best_len = key, len(value)
+    return best
+
+
+def budget_payload(payload: Dict[str, Any], terms: Iterable[str] = (),
+                   max_tokens: int = TOOL_RESULT_MAX_TOKENS,
+                   preserve_order: bool = False) -> Dict[str, Any]:
+    """
+    Return a copy of `payload` whose row list is collapsed and, if still over
+    budget, cut to fit: the most relevant rows are kept (the leading rows when
+    `preserve_order`, for lists the tool already ranked), in their original order.
+    """
+    key = _largest_row_list(payload)
+    if key is None:
+        return payload
+
+    original_rows = payload[key]
+    rows = collapse_rows(original_rows)
+
+    trimmed = dict(payload)
+    trimmed[key] = rows
+    if estimate_tokens(trimmed) > max_tokens:
+        order = list(range(len(rows)))
+        if not preserve_order:
+            term_set = set(terms)
+            order.sort(key=lambda i: (-_relevance(rows[i], term_set), i))
+        base = estimate_tokens({k: v for k, v in trimmed.items() if k != key}) + 8
+        kept, used = [], base
+        for i in order:
+            cost = estimate_tokens(rows[i])
+            if kept and used + cost > max_tokens:
+                break
+            kept.append(i)
+            used += cost
+        trimmed[key] = [rows[i] for i in sorted(kept)]
+
+    omitted = len(rows) - len(trimmed[key])
+    collapsed = len(original_rows) - len(rows)
+    if omitted:
+        trimmed["omitted_rows"] = omitted
+    if collapsed:
+        trimmed["collapsed_duplicate_rows"] = collapsed
+    return trimmed
+
+
+def budget_tool_result(block: ToolResultContentBlock, terms: Iterable[str] = (),
+                       max_tokens: int = TOOL_RESULT_MAX_TOKENS,
+                       preserve_order: bool = False) -> ToolResultContentBlock:
+    """Apply budget_payload to every JSON content item of a tool result."""
+    changed = False
+    content = []
+    for item in block.toolResult.content:
+        if isinstance(item, JsonContent):
+            budgeted = budget_payload(item.json, terms, max_tokens, preserve_order)
+            changed = changed or budgeted is not item.json
+            content.append(JsonContent(json=budgeted))
+        else:
+            content.append(item)
+    if not changed:
+        return block
+    return ToolResultContentBlock(
+        toolResult=ToolResult(toolUseId=block.toolResult.toolUseId, content=content)
+    )
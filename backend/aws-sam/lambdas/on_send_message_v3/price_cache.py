@@ -0,0 +1,254 @@
+"""Quota-aware cache in front of the Google price search.
+
+Results are persisted in DynamoDB keyed on the normalized vehicle, the daily
+Custom Search budget is tracked with an atomic counter in the same table, and
+concurrent lookups of the same vehicle share a single search.
+"""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+from botocore.exceptions import ClientError
+
+import aws_clients
+
+import tool_telemetry
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # Google resets quotas at midnight Pacific
+except Exception: #pylint: disable=broad-exception-caught
+    _QUOTA_TZ = timezone.utc
+
+PRICE_CACHE_TABLE = os.getenv("PRICE_CACHE_TABLE", "price-cache")
+DAILY_QUOTA = int(os.getenv("GOOGLE_DAILY_QUOTA", "100"))
+FRESH_SECONDS = int(os.getenv("PRICE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+QUOTA_EXHAUSTED_MESSAGE = "Daily Google search quota exhausted and no cached price for this vehicle."
+
+
+PriceResult = Dict[str, Any]
+
+_memory: Dict[str, Dict[str, Any]] = {}  # key -> {"result": ..., "fetched_at": ...}
+_memory_lock = threading.Lock()
+_exhausted_day: Optional[str] = None
+
+
+class _Flight:
+    """One in-progress lookup that other threads can wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[PriceResult] = None
+
+
+_inflight: Dict[str, _Flight] = {}
+_inflight_lock = threading.Lock()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# HELPERS
+# ────────────────────────────────────────────────────────────────────────────────
+def _norm(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def cache_key(year: int, make: str, model: Optional[str]) -> str:
+    """Normalized key, so 'Toyota CR-V' and 'toyota cr v' share one entry."""
+    return f"price#{int(year)}#{_norm(make)}#{_norm(model)}"
+
+
+def _today() -> str:
+    return datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+def _to_dynamo(data: Any) -> Any:
+    if isinstance(data, float):
+        return Decimal(str(data))
+    if isinstance(data, dict):
+        return {k: _to_dynamo(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_to_dynamo(i) for i in data]
+    return data
+
+
+def _from_dynamo(data: Any) -> Any:
+    if isinstance(data, Decimal):
+        return int(data) if data == data.to_integral_value() else float(data)
+    if isinstance(data, dict):
+        return {k: _from_dynamo(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_from_dynamo(i) for i in data]
+    return data
+
+
+def _annotate(entry: Dict[str, Any], stale: bool) -> PriceResult:
+    """Copy a cached result and note where it came from."""
+    tool_telemetry.mark_cache_hit()
+    result = dict(entry["result"])
+    result["cached_at"] = datetime.fromtimestamp(
+        entry["fetched_at"], timezone.utc).strftime("%Y-%m-%d")
+    if stale:
+        result["stale"] = True
+    return result
+
+
+def _remember(key: str, entry: Dict[str, Any]) -> None:
+    with _memory_lock:
+        _memory[key] = entry
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# PERSISTENCE
+# ────────────────────────────────────────────────────────────────────────────────
+def _load(key: str) -> Optional[Dict[str, Any]]:
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry:
+        return entry
+    try:
+        item = aws_clients.table(PRICE_CACHE_TABLE).get_item(Key={"cacheKey": key}).get("Item")
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"[PriceCache] Read failed for {key}: {e}")
+        return None
+    if not item:
+        return None
+    entry = {"result": _from_dynamo(item["result"]), "fetched_at": int(item["fetchedAt"])}
+    _remember(key, entry)
+    return entry
+
+
+def _store(key: str, result: PriceResult) -> Dict[str, Any]:
+    entry = {"result": result, "fetched_at": int(time.time())}
+    _remember(key, entry)
+    try:
+        aws_clients.table(PRICE_CACHE_TABLE).put_item(Item={
+            "cacheKey": key,
+            "result": _to_dynamo(result),
+            "fetchedAt": entry["fetched_at"],
+        })
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"[PriceCache] Write failed for {key}: {e}")
+    return entry
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# QUOTA BUDGET
+# ────────────────────────────────────────────────────────────────────────────────
+def mark_quota_exhausted() -> None:
+    """Stop spending searches for the rest of the day (Google returned 403: daily quota spent)."""
+    global _exhausted_day #pylint: disable=global-statement
+    _exhausted_day = _today()
+
+
+def quota_exhausted_today() -> bool:
+    """True once today's budget is known to be spent (no DynamoDB call)."""
+    return _exhausted_day == _today()
+
+
+def consume_quota() -> bool:
+    """
+    Atomically take one search from today's budget; call it right before the
+    request goes out. False once the budget is spent.
+    """
+    day = _today()
+    if _exhausted_day == day:
+        return False
+    try:
+        aws_clients.table(PRICE_CACHE_TABLE).update_item(
+            Key={"cacheKey": f"quota#{day}"},
+            UpdateExpression="ADD used :one SET expiresAt = if_not_exists(expiresAt, :exp)",
+            ConditionExpression="attribute_not_exists(used) OR used < :limit",
+            ExpressionAttributeValues={
+                ":one": 1,
+                ":limit": DAILY_QUOTA,
+                ":exp": int(time.time()) + 2 * 24 * 3600,
+            },
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            mark_quota_exhausted()
+            return False
+        print(f"[PriceCache] Quota counter unavailable: {e}")
+        return True
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"[PriceCache] Quota counter unavailable: {e}")
+        return True
+
+
+def refund_quota() -> None:
+    """Give back a unit taken by consume_quota() when no request was sent after all."""
+    try:
+        aws_clients.table(PRICE_CACHE_TABLE).update_item(
+            Key={"cacheKey": f"quota#{_today()}"},
+            UpdateExpression="ADD used :minus_one",
+            ConditionExpression="used > :zero",
+            ExpressionAttributeValues={":minus_one": -1, ":zero": 0},
+        )
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"[PriceCache] Quota refund failed: {e}")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# LOOKUP
+# ────────────────────────────────────────────────────────────────────────────────
+def _resolve(key: str, fetch: Callable[[], PriceResult]) -> PriceResult:
+    entry = _load(key)
+    if entry and time.time() - entry["fetched_at"] < FRESH_SECONDS:
+        return _annotate(entry, stale=False)
+
+    if quota_exhausted_today():
+        if entry:
+            return _annotate(entry, stale=True)
+        return {"error": QUOTA_EXHAUSTED_MESSAGE}
+
+    result = fetch()  # takes its unit of quota via consume_quota() when it sends
+    if "error" not in result:
+        _store(key, result)
+        return result
+
+    if result.get("quota_exhausted"):
+        mark_quota_exhausted()
+    if entry:
+        return _annotate(entry, stale=True)
+    return result
+
+
+def lookup(year: int, make: str, model: Optional[str],
+           fetch: Callable[[], PriceResult]) -> PriceResult:
+    """
+    Return a price result for the vehicle, calling `fetch` only when the cache
+    has nothing fresh and today's quota is not known to be spent; `fetch`
+    itself calls consume_quota() right before its request. Concurrent callers for the
+    same vehicle wait on the first caller's search instead of issuing their own.
+    """
+    key = cache_key(year, make, model)
+
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry and time.time() - entry["fetched_at"] < FRESH_SECONDS:
+        return _annotate(entry, stale=False)
+
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            _inflight[key] = flight
+
+    if not leader:
+        flight.done.wait()
+        tool_telemetry.mark_cache_hit()  # served by another caller's search
+        return dict(flight.result)
+
+    try:
+        flight.result = _resolve(key, fetch)
+    except Exception as e: #pylint: disable=broad-exception-caught
+        flight.result = {"error": str(e)}
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+    return dict(flight.result)
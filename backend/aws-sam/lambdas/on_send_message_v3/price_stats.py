@@ -0,0 +1,153 @@
+"""Deterministic price statistics for the Google price lookup.
+
+Turns dollar amounts found in search results into one robust estimate:
+parse single prices and ranges, drop implausible values, drop outliers
+(MAD for small samples, IQR otherwise), then report the median with an
+interquartile band and the sources each surviving number came from.
+"""
+import re
+import statistics
+from typing import Any, Dict, List, Optional
+
+MIN_PLAUSIBLE_USD = 500       # below this it's a fee, a payment or junk
+MAX_PLAUSIBLE_USD = 40_000    # above this it's usually new-car MSRP, not used value
+IQR_MIN_SAMPLES = 8           # below this, quartiles are too noisy; use MAD instead
+MAD_CUTOFF = 3.5              # modified z-score threshold (Iglewicz & Hoaglin)
+
+# "$18k" / "$18.5K": the suffix must touch a bare number and end the word, so the
+# "K" of "$18,500 KBB" is not read as thousands
+_AMOUNT = r"\$\s?(?:(\d+(?:\.\d+)?)[kK]\b|(\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)"
+PRICE_PATTERN = re.compile(_AMOUNT + r"(?:\s*(?:-|–|to)\s*" + _AMOUNT + r")?")
+
+
+def _amount(thousands: Optional[str], digits: Optional[str]) -> int:
+    if thousands:
+        return int(round(float(thousands) * 1000))
+    return int(digits.replace(",", ""))
+
+
+def extract_prices(text: str, source: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Find dollar amounts and ranges in free text. A range contributes its
+    midpoint as one observation (its bounds are kept alongside).
+
+    >>> [o["value"] for o in extract_prices("Fair price $18,500 KBB")]
+    [18500.0]
+    >>> [o["value"] for o in extract_prices("$19,995 kbb.com")]
+    [19995.0]
+    >>> [o["value"] for o in extract_prices("trade-in $18.5k, retail $21K")]
+    [18500.0, 21000.0]
+    >>> [(o["low"], o["high"]) for o in extract_prices("$17k-$19k or $16,000 to $18,000")]
+    [(17000, 19000), (16000, 18000)]
+    >>> [o["value"] for o in extract_prices("$18 KBB, $18kbb")]
+    [18.0, 18.0]
+    """
+    observations = []
+    for match in PRICE_PATTERN.finditer(text or ""):
+        low = _amount(match.group(1), match.group(2))
+        if match.group(3) or match.group(4):
+            high = _amount(match.group(3), match.group(4))
+            low, high = min(low, high), max(low, high)
+        else:
+            high = low
+        observations.append({
+            "value": (low + high) / 2,
+            "low": low,
+            "high": high,
+            "text": match.group(0).strip(),
+            "source": source,
+        })
+    return observations
+
+
+def _mad_filter(values: List[float]) -> List[bool]:
+    median = statistics.median(values)
+    mad = statistics.median([abs(v - median) for v in values])
+    if mad == 0:
+        return [True] * len(values)
+    return [0.6745 * abs(v - median) / mad <= MAD_CUTOFF for v in values]
+
+
+def _iqr_filter(values: List[float]) -> List[bool]:
+    q1, _, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    spread = q3 - q1
+    lo, hi = q1 - 1.5 * spread, q3 + 1.5 * spread
+    return [lo <= v <= hi for v in values]
+
+
+def summarize_prices(observations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Robust statistics over price observations.
+    Returns median/band/confidence plus which observations were kept, or
+    {"count": 0} when nothing plausible remains.
+    """
+    plausible = [o for o in observations
+                 if MIN_PLAUSIBLE_USD <= o["value"] <= MAX_PLAUSIBLE_USD]
+    if not plausible:
+        return {"count": 0, "discarded": len(observations)}
+
+    values = [o["value"] for o in plausible]
+    if len(values) >= IQR_MIN_SAMPLES:
+        keep, method = _iqr_filter(values), "iqr"
+    elif len(values) >= 3:
+        keep, method = _mad_filter(values), "mad"
+    else:
+        keep, method = [True] * len(values), "none"
+    kept = [o for o, k in zip(plausible, keep) if k]
+    kept_values = sorted(o["value"] for o in kept)
+
+    median = statistics.median(kept_values)
+    if len(kept_values) >= 2:
+        band_low, _, band_high = statistics.quantiles(kept_values, n=4, method="inclusive")
+    else:
+        band_low = band_high = median
+
+    relative_spread = (band_high - band_low) / median if median else 1.0
+    if len(kept_values) >= 5 and relative_spread <= 0.25:
+        confidence = "high"
+    elif len(kept_values) >= 3 and relative_spread <= 0.5:
+        confidence = "medium"
+    else:
+        confidence = "low"
+
+    return {
+        "count": len(kept_values),
+        "discarded": len(observations) - len(kept_values),
+        "outlier_method": method,
+        "median_usd": round_price(median),
+        "band_low_usd": round_price(band_low),
+        "band_high_usd": round_price(band_high),
+        "confidence": confidence,
+        "kept": kept,
+    }
+
+
+def round_price(value: float) -> int:
+    """Round to the nearest $100, the precision valuation sites quote."""
+    return int(round(value / 100.0)) * 100
+
+
+def price_sentence(year: int, make: str, model: Optional[str], stats: Dict[str, Any],
+                   sources: List[Dict[str, str]]) -> str:
+    """One ready-to-use sentence plus compact source attribution."""
+    vehicle = " ".join(p for p in (str(year), make, model or "") if p)
+    if not stats.get("count"):
+        return f"No usable used-car price was found for a {vehicle}."
+
+    sentence = f"A {vehicle} is worth ${stats['median_usd']:,} in average condition"
+    if stats["band_low_usd"] != stats["band_high_usd"]:
+        sentence += (f" (typical range ${stats['band_low_usd']:,}–${stats['band_high_usd']:,}, "
+                     f"{stats['confidence']} confidence)")
+    sentence += "."
+
+    cited: Dict[int, List[str]] = {}
+    for o in stats["kept"]:
+        if o["source"] is not None:
+            cited.setdefault(o["source"], []).append(o["text"])
+    if cited:
+        parts = []
+        for idx, texts in sorted(cited.items()):
+            title = (sources[idx].get("title") if idx < len(sources) else "") or f"source {idx + 1}"
+            parts.append(f"{title[:50]} ({', '.join(texts[:3])})")
+        sentence += " Based on: " + "; ".join(parts) + "."
+    return sentence
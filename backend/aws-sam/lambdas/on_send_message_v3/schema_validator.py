@@ -0,0 +1,108 @@
+"""Precompiled validators for tool input JSON schemas.
+
+Covers the subset of JSON Schema the tool SPECs use (type, properties,
+required, additionalProperties, enum, minimum/maximum, minLength, items).
+Each schema is compiled once into a closure so per-call validation is a few
+dict lookups and isinstance checks.
+"""
+import re
+from typing import Any, Callable, Dict, List
+
+Validator = Callable[[Any], List[str]]
+
+_INT_STRING = re.compile(r"^-?\d+$")
+
+
+def _is_integer(value: Any) -> bool:
+    # The model sometimes quotes numbers; tools already int() them, so accept "2020"
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    if isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, str) and bool(_INT_STRING.match(value.strip()))
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_integer,
+    "number": lambda v: _is_integer(v) or (isinstance(v, float)),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def compile_schema(schema: Dict[str, Any], path: str = "input") -> Validator:
+    """Compile a JSON schema into a function returning a list of error strings."""
+    checks: List[Validator] = []
+    type_check = None
+
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        type_fns = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+        if type_fns:
+            def check_type(value, _fns=type_fns, _types=types):
+                if any(fn(value) for fn in _fns):
+                    return []
+                return [f"{path} must be {' or '.join(_types)}"]
+            checks.append(check_type)
+            type_check = check_type
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        checks.append(lambda v: [] if v in allowed else [f"{path} must be one of {allowed}"])
+
+    if "minLength" in schema:
+        min_len = schema["minLength"]
+        checks.append(lambda v: [f"{path} is too short"]
+                      if isinstance(v, str) and len(v.strip()) < min_len else [])
+
+    for key, op, word in (("minimum", lambda a, b: a < b, "at least"),
+                          ("maximum", lambda a, b: a > b, "at most")):
+        if key in schema:
+            def check_bound(value, _limit=schema[key], _op=op, _word=word):
+                if not _is_integer(value) and not isinstance(value, float):
+                    return []
+                number = float(value)
+                return [f"{path} must be {_word} {_limit}"] if _op(number, _limit) else []
+            checks.append(check_bound)
+
+    properties = {
+        name: compile_schema(sub, f"{path}.{name}")
+        for name, sub in (schema.get("properties") or {}).items()
+    }
+    required = list(schema.get("required") or [])
+    closed = schema.get("additionalProperties") is False
+    if properties or required or closed:
+        def check_object(value):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}.{name} is required" for name in required
+                      if value.get(name) in (None, "")]
+            for name, item in value.items():
+                sub = properties.get(name)
+                if sub is not None:
+                    if item is not None:
+                        errors.extend(sub(item))
+                elif closed:
+                    errors.append(f"{path}.{name} is not allowed")
+            return errors
+        checks.append(check_object)
+
+    if isinstance(schema.get("items"), dict):
+        item_check = compile_schema(schema["items"], f"{path}[]")
+        checks.append(lambda v: [e for i in v for e in item_check(i)] if isinstance(v, list) else [])
+
+    def validate(value: Any) -> List[str]:
+        errors: List[str] = []
+        for check in checks:
+            errors.extend(check(value))
+            if errors and check is type_check:
+                break  # wrong type: the remaining checks would only add noise
+        return errors
+
+    return validate
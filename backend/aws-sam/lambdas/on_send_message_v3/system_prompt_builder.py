@@ -1,8 +1,18 @@
 """Builds system Prompt"""
 import os
+from functools import lru_cache
 from typing import List 
 from pydantic_input_comps import FullToolSpec, SystemPrompt
 
+@lru_cache(maxsize=1)
+def load_appendix() -> str:
+    """prompt_append.txt, read once per container."""
+    appendix_path = os.path.join(os.path.dirname(__file__), "prompt_append.txt")
+    if os.path.exists(appendix_path):
+        with open(appendix_path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    return ""
+
 def build_system_prompt(specs: List[FullToolSpec], turn: int, max_turns: int) -> SystemPrompt:
     """
     Construct system prompt with tool listings from Pydantic FullToolSpec objects 
@@ -17,12 +27,8 @@ def build_system_prompt(specs: List[FullToolSpec], turn: int, max_turns: int) ->
 
     allowed_block = "\n".join(lines) or "- (no tools available)"
 
-    # 2. Load appendix (unchanged)
-    appendix_text = ""
-    appendix_path = os.path.join(os.path.dirname(__file__), "prompt_append.txt")
-    if os.path.exists(appendix_path):
-        with open(appendix_path, "r", encoding="utf-8") as f:
-            appendix_text = f.read().strip()
+    # 2. Load appendix (cached after the first read)
+    appendix_text = load_appendix()
 
     # 3. Base prompt
     base_prompt = (
@@ -0,0 +1,124 @@
+'''Runs one turn's tool calls in parallel, each against its own deadline'''
+import json
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from pydantic_input_comps import JsonContent
+from pydantic_models import TextContentBlock, ToolResultContentBlock
+from pydantic_resp_comps import ToolUse
+from tools import dispatch, fan_out, error_result_block, tool_timeout
+from emitter import Emitter
+import tool_telemetry
+
+MAX_TOOL_WORKERS = 10
+LIVENESS_POLL_SECONDS = 1.0  # how often a long wait re-checks that the client is still there
+SUMMARY_PREVIEW_CHARS = 300  # partial result shown to the client in tool_finished
+
+
+def _timed_dispatch(*args) -> Tuple[ToolResultContentBlock, Dict[str, Any]]:
+    """dispatch() on a worker thread, returning what the tool reported about itself."""
+    tool_telemetry.reset()
+    block = dispatch(*args)
+    return block, tool_telemetry.snapshot()
+
+
+def _preview(block: ToolResultContentBlock) -> str:
+    """Short text preview of a tool result for the tool_finished event."""
+    parts = []
+    for item in block.toolResult.content:
+        if isinstance(item, TextContentBlock):
+            parts.append(item.text)
+        elif isinstance(item, JsonContent):
+            parts.append(json.dumps(item.json, separators=(",", ":"), default=str))
+    text = " ".join(parts)
+    return text if len(text) <= SUMMARY_PREVIEW_CHARS else text[:SUMMARY_PREVIEW_CHARS] + "…"
+
+
+def run_tools(groups: List[List[ToolUse]], connection_id: str, bedrock,
+              emitter: Emitter, debug: bool = True,
+              context_terms: Iterable[str] = ()) -> List[ToolResultContentBlock]:
+    """
+    Execute each group of identical tool uses once and return a toolResult for
+    every toolUseId. A tool that raises or misses its deadline yields an error
+    result for its own ids; the other tools' results are kept. Emits
+    tool_started / tool_finished progress events as tools start and complete.
+    """
+    executor = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS)
+    tool_result_blocks: List[ToolResultContentBlock] = []
+    try:
+        started = time.monotonic()
+        futures: Dict[Future, List[ToolUse]] = {}
+        deadlines: Dict[Future, float] = {}
+        for group in groups:
+            emitter.emit_event("tool_started", tool=group[0].name,
+                               tool_use_ids=[tu.toolUseId for tu in group])
+            future = executor.submit(
+                _timed_dispatch,
+                group[0].name,
+                connection_id,
+                group[0].input,
+                group[0].toolUseId,
+                bedrock,
+                debug,
+                context_terms
+            )
+            futures[future] = group
+            deadlines[future] = started + tool_timeout(group[0].name)
+
+        pending = set(futures)
+        while pending:
+            if not emitter.is_connected():
+                # Nobody is listening: drop queued tools, stop waiting on running ones
+                for future in pending:
+                    future.cancel()
+                    tool_result_blocks.extend(
+                        error_result_block(tu.toolUseId, "Client disconnected; tool cancelled.")
+                        for tu in futures[future]
+                    )
+                break
+            next_deadline = min(deadlines[f] for f in pending)
+            wait_for = min(LIVENESS_POLL_SECONDS, max(0.0, next_deadline - time.monotonic()))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                group = futures[future]
+                ids = [tu.toolUseId for tu in group]
+                latency_ms = int((time.monotonic() - started) * 1000)
+                try:
+                    block, facts = future.result()
+                    tool_result_blocks.extend(fan_out(block, ids))
+                    emitter.emit_event("tool_finished", tool=group[0].name, tool_use_ids=ids,
+                                       ok=True, latency_ms=latency_ms,
+                                       cache_hit=facts.get("cache_hit", False),
+                                       summary=_preview(block))
+                except Exception as e: #pylint: disable=broad-exception-caught
+                    emitter.emit_event("tool_finished", tool=group[0].name, tool_use_ids=ids,
+                                       ok=False, latency_ms=latency_ms, cache_hit=False,
+                                       error=str(e))
+                    tool_result_blocks.extend(
+                        error_result_block(i, f"Tool {group[0].name} failed: {e}") for i in ids
+                    )
+
+            now = time.monotonic()
+            expired = {f for f in pending if deadlines[f] <= now}
+            for future in expired:
+                future.cancel()  # drops it if not started; a running request ends on its own timeout
+                group = futures[future]
+                emitter.emit_event("tool_finished", tool=group[0].name,
+                                   tool_use_ids=[tu.toolUseId for tu in group],
+                                   ok=False, latency_ms=int((now - started) * 1000),
+                                   cache_hit=False, error="timeout")
+                tool_result_blocks.extend(
+                    error_result_block(
+                        tu.toolUseId,
+                        f"Tool {group[0].name} timed out after "
+                        f"{tool_timeout(group[0].name):.0f}s; no result available.")
+                    for tu in group
+                )
+            pending -= expired
+    finally:
+        # Never block the turn on stragglers
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return tool_result_blocks
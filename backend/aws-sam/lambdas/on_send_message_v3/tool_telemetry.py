@@ -0,0 +1,26 @@
+'''Per-call facts a tool reports about itself (e.g. a cache hit) for progress events'''
+import threading
+from typing import Any, Dict
+
+_local = threading.local()
+
+
+def reset() -> None:
+    """Start a fresh record for the tool call running on this thread."""
+    _local.facts = {}
+
+
+def mark_cache_hit() -> None:
+    """Note that the current tool call was answered from a cache."""
+    _facts()["cache_hit"] = True
+
+
+def snapshot() -> Dict[str, Any]:
+    """Facts recorded on this thread since the last reset()."""
+    return dict(_facts())
+
+
+def _facts() -> Dict[str, Any]:
+    if not hasattr(_local, "facts"):
+        _local.facts = {}
+    return _local.facts
@@ -2,78 +2,198 @@
 # TODO: Refactoring here would probably be ensuring all tools respond never as as dict
 ## then removing the dict option as a dict return object in the declations of pydantic models 
 
-from typing import List
+import importlib
+import json
+import os
+import threading
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, NamedTuple
 from pydantic_input_comps import (
     ToolSpecsBundle,
     FullToolSpec,
     ToolConfigItem,
+    ToolResult,
 )
+from pydantic_resp_comps import ToolUse
 from pydantic_models import (
     ToolConfig,
     ToolResultContentBlock,
+    TextContentBlock,
 )
+from schema_validator import Validator, compile_schema
+from name_resolver import resolve_input
+from upstream_http import UpstreamUnavailable
+from payload_budget import TOOL_RESULT_MAX_TOKENS, budget_tool_result
 
-from . import (
-    fetch_models_of_make_year,
-    fetch_gas_mileage,
-    fetch_safety_ratings,
-    fetch_price_of_car
-)
+### Registry: tool name -> module in this package. Every module is imported the first time
+### tool_specs() runs (warm-up does this during Lambda init, otherwise the first turn does),
+### since the specs live in the modules; get_tool() then only looks the module up.
+TOOL_MODULES: Dict[str, str] = {
+    "fetch_models_of_make_year": "fetch_models_of_make_year",
+    "fetch_gas_mileage": "fetch_gas_mileage",
+    "fetch_safety_ratings": "fetch_safety_ratings",
+    "google_vehicle_price_lookup": "fetch_price_of_car",
+    "recommend_vehicles": "recommend_vehicles",
+}
+
+
+# Deadline for tools that do not declare their own TIMEOUT_SECONDS (includes summarization)
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "25"))
+
+
+class RegisteredTool(NamedTuple):
+    """A loaded tool module plus its precompiled input validator."""
+    module: ModuleType
+    validate: Validator
+
+
+_registry: Dict[str, RegisteredTool] = {}
+_registry_lock = threading.Lock()
 
-ALL_TOOLS = [
-    fetch_models_of_make_year,
-    fetch_gas_mileage,
-    fetch_safety_ratings,
-    fetch_price_of_car
-]
 
-from small_model_api_summarizer import create_summary_result_block
+def get_tool(name: str) -> RegisteredTool:
+    """O(1) lookup of a tool by name (imports its module if tool_specs() has not yet)."""
+    tool = _registry.get(name)
+    if tool is not None:
+        return tool
+    if name not in TOOL_MODULES:
+        raise ValueError(f"Unknown tool: {name}")
+    with _registry_lock:
+        tool = _registry.get(name)
+        if tool is None:
+            module = importlib.import_module(f".{TOOL_MODULES[name]}", __name__)
+            spec_name = module.SPEC["toolSpec"]["name"]
+            if spec_name != name:
+                raise RuntimeError(f"Tool module {module.__name__} declares '{spec_name}', "
+                                   f"registered as '{name}'")
+            schema = module.SPEC["toolSpec"]["inputSchema"]["json"]
+            tool = RegisteredTool(module=module, validate=compile_schema(schema))
+            _registry[name] = tool
+    return tool
+
+
+def all_tools() -> List[RegisteredTool]:
+    """Every registered tool, in registry order (loads any not yet imported)."""
+    return [get_tool(name) for name in TOOL_MODULES]
+
 
-### Name dedupe
-_tool_names: List[str] = [t.SPEC["toolSpec"]["name"] for t in ALL_TOOLS]
-if len(_tool_names) != len(set(_tool_names)):
-    raise RuntimeError(f"Duplicate tool names detected: {_tool_names}")
+def tool_timeout(name: str) -> float:
+    """Per-tool deadline in seconds, from the module's TIMEOUT_SECONDS if it has one."""
+    try:
+        return float(getattr(get_tool(name).module, "TIMEOUT_SECONDS", DEFAULT_TOOL_TIMEOUT))
+    except ValueError:
+        return DEFAULT_TOOL_TIMEOUT
 
 
+def error_result_block(tool_use_id: str, text: str) -> ToolResultContentBlock:
+    """Plain-text toolResult used for failures, timeouts and rejected input."""
+    tb = TextContentBlock(text=text)
+    return ToolResultContentBlock(toolResult=ToolResult(toolUseId=tool_use_id, content=[tb]))
+
+
+@lru_cache(maxsize=None)
 def tool_specs() -> List[FullToolSpec]:
-    """Gathers Tool Specs as List[FullToolSpec]"""
-    return [FullToolSpec.model_validate(t.SPEC) for t in ALL_TOOLS]
+    """Gathers Tool Specs as List[FullToolSpec] (static, so built once per container)"""
+    return [FullToolSpec.model_validate(t.module.SPEC) for t in all_tools()]
 
 
 def dispatch(name: str, connection_id: str,
-             tool_input: dict, tool_use_id: str, bedrock,debug = True) -> ToolResultContentBlock:
+             tool_input: dict, tool_use_id: str, bedrock,debug = True,
+             context_terms: Iterable[str] = ()) -> ToolResultContentBlock:
     """
     Dispatch a tool by its exact name, execute it, and optionally summarize the result.
+    `context_terms` (words from the conversation) rank rows when a payload must be trimmed.
     Always returns a ToolResultContentBlock.
     """
-    executed_tool = None
-    for t in ALL_TOOLS:
-        if name == t.SPEC["toolSpec"]["name"]:
-            executed_tool = t
-            break
-
-    if executed_tool is None:
-        raise ValueError(f"Unknown tool: {name}")
-
-    original_tool_result_block: ToolResultContentBlock = executed_tool.handle(
-        connection_id,
-        tool_input,
-        tool_use_id
+    executed_tool = get_tool(name)
+
+    # Reject malformed input before any network call (and skip the summarizer)
+    errors = executed_tool.validate(tool_input)
+    if errors:
+        return error_result_block(tool_use_id,
+                                  f"Error: invalid input for {name}: {'; '.join(errors)}.")
+
+    # "Chevy" / "CR V" / "F150" → dataset names, so upstream lookups don't come back empty
+    tool_input = resolve_input(tool_input)
+
+    try:
+        original_tool_result_block: ToolResultContentBlock = executed_tool.module.handle(
+            connection_id,
+            tool_input,
+            tool_use_id
+        )
+    except UpstreamUnavailable as e:
+        # Open circuit / full bulkhead: answer immediately, nothing worth summarizing
+        return error_result_block(tool_use_id, f"Service unavailable: {e} Try again later.")
+    # Cap oversized payloads (a tool may set MAX_RESULT_TOKENS to override the default,
+    # and PRESERVE_ORDER when its rows are already ranked)
+    original_tool_result_block = budget_tool_result(
+        original_tool_result_block,
+        context_terms,
+        getattr(executed_tool.module, "MAX_RESULT_TOKENS", TOOL_RESULT_MAX_TOKENS),
+        getattr(executed_tool.module, "PRESERVE_ORDER", False),
     )
     if debug:
         print ("\n[No summary]", original_tool_result_block.toolResult.content)
 
+    # Tools whose output is already a final sentence opt out of the summarizer round trip
+    if not getattr(executed_tool.module, "SUMMARIZE", True):
+        return original_tool_result_block
+
+    # Deferred: only needed once a tool result actually gets summarized
+    from small_model_api_summarizer import create_summary_result_block #pylint: disable=import-outside-toplevel
     summarized_tool: ToolResultContentBlock = create_summary_result_block(bedrock,
                                                                          original_tool_result_block,
-                                                                         executed_tool.prompt())
+                                                                         executed_tool.module.prompt())
 
     return summarized_tool
 
+def _canonicalize(value: Any) -> Any:
+    """Normalize casing/whitespace and numeric strings so equivalent inputs compare equal."""
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, str):
+        text = " ".join(value.split()).lower()
+        return int(text) if text.isdecimal() else text  # isdigit() admits "²", which int() rejects
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonical_tool_key(name: str, tool_input: Dict[str, Any]) -> str:
+    """Key identifying one distinct unit of work: tool name + canonical input."""
+    return name + ":" + json.dumps(_canonicalize(tool_input or {}), sort_keys=True, default=str)
+
+
+def group_tool_uses(tool_uses: List[ToolUse]) -> List[List[ToolUse]]:
+    """
+    Group tool uses that ask for the same thing, preserving first-seen order.
+    The first ToolUse of each group is the one that gets executed.
+    """
+    groups: Dict[str, List[ToolUse]] = {}
+    for tu in tool_uses:
+        groups.setdefault(canonical_tool_key(tu.name, tu.input), []).append(tu)
+    return list(groups.values())
+
+
+def fan_out(result: ToolResultContentBlock,
+            tool_use_ids: List[str]) -> List[ToolResultContentBlock]:
+    """Copy one (already summarized) result to every toolUseId that requested it."""
+    return [
+        ToolResultContentBlock(
+            toolResult=ToolResult(toolUseId=tool_use_id, content=result.toolResult.content)
+        )
+        for tool_use_id in tool_use_ids
+    ]
+
+
+@lru_cache(maxsize=None)
 def output_tool_specs() -> ToolSpecsBundle:
     """Bundles the Tool Specs into a single returned object"""
-    validated_specs: List[FullToolSpec] = [
-        FullToolSpec.model_validate(t.SPEC) for t in ALL_TOOLS
-    ]
+    validated_specs: List[FullToolSpec] = tool_specs()
 
     tool_config_items = [
         ToolConfigItem(toolSpec=spec.toolSpec)
@@ -1,13 +1,17 @@
 """This tool make's API calls to get gas milage"""
 import xml.etree.ElementTree as ET
 from typing import Dict, Any
-import requests
 from pydantic_input_comps import (ToolResult, JsonContent, ToolInputSchema, ToolSpec, FullToolSpec)
+import upstream_http
+from upstream_http import UpstreamUnavailable
 
 from pydantic_models import (
     ToolResultContentBlock,
     TextContentBlock,
 )
+
+TIMEOUT_SECONDS = 25  # two fueleconomy.gov calls, then the summary
+
 def prompt():
     """Returns Tool Specific Prompt""" 
     p = "Extract the essential meaning from this JSON data and rewrite it as a brief"+\
@@ -53,7 +57,7 @@ def _get_vehicle_id(year: int, make: str, model: str) -> str:
     url = f"https://www.fueleconomy.gov/ws/rest/vehicle/menu/options?year={year}&make={make}&model={model}"
 
     try:
-        resp = requests.get(url, timeout=15)
+        resp = upstream_http.get(url, timeout=15)
         resp.raise_for_status()
 
         if "application/json" not in resp.headers.get("Content-Type", ""):
@@ -67,6 +71,8 @@ def _get_vehicle_id(year: int, make: str, model: str) -> str:
             options = data.get("menuItem", [])
             return options[0]["value"] if options else None
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e: #pylint disable=broad-exception-caught
         print(f"Error fetching vehicle ID: {e}")
         return None
@@ -75,7 +81,7 @@ def _get_vehicle_id(year: int, make: str, model: str) -> str:
 def _fetch_vehicle_details(vehicle_id: str) -> Dict[str, Any]:
     url = f"https://www.fueleconomy.gov/ws/rest/vehicle/{vehicle_id}"
     try:
-        resp = requests.get(url, timeout=15)
+        resp = upstream_http.get(url, timeout=15)
         resp.raise_for_status()
 
         if "application/json" not in resp.headers.get("Content-Type", ""):
@@ -108,6 +114,8 @@ def _fetch_vehicle_details(vehicle_id: str) -> Dict[str, Any]:
                 "fuel_cost_annual": float(data.get("fuelCost08", 0)),
             }
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e: #pylint disable=broad-exception-caught
         print(f"Error fetching fuel economy details: {e}")
         return {"error": str(e)}
@@ -1,9 +1,25 @@
-from typing import Dict, List, Any, Union
-import requests
+import json
+import os
+import threading
+from typing import Dict, List, Any, Optional, Union
 
 from pydantic_input_comps import (ToolResult,JsonContent,ToolInputSchema
                                   ,ToolSpec,FullToolSpec)
 from pydantic_models import (ToolResultContentBlock, TextContentBlock)
+import tool_telemetry
+import upstream_http
+from upstream_http import UpstreamUnavailable
+
+TIMEOUT_SECONDS = 20  # one vPIC call, then the summary
+MAX_MODELS = 100
+MAX_RESULT_TOKENS = 3000  # room for MAX_MODELS rows; the largest make/year is ~2500 tokens
+
+# make/year -> models, precomputed from the NHTSA dataset (backend/data/build_models_index.py)
+MODELS_INDEX_PATH = os.getenv(
+    "MODELS_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 "data", "models_by_make_year.json"),
+)
 
 def prompt():
     """Returns Tool Specific Prompt""" 
@@ -32,6 +48,50 @@ SPEC = FullToolSpec(
 ).model_dump(by_alias=True)
 
 
+# ────────────────────────────────────────────────────────────────────────────────
+# Local index — years inside the snapshot are answered without a network call
+# ────────────────────────────────────────────────────────────────────────────────
+_index: Optional[Dict[str, Any]] = None
+_index_lock = threading.Lock()
+
+
+def _load_index() -> Dict[str, Any]:
+    global _index #pylint: disable=global-statement
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    with open(MODELS_INDEX_PATH, "r", encoding="utf-8") as f:
+                        _index = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Models index unavailable, using vPIC only: {e}")
+                    _index = {"years": [], "makes": {}}
+    return _index
+
+
+def prime() -> None:
+    """Load the make/year index ahead of the first call (picked up by warmup)."""
+    _load_index()
+
+
+def _from_index(year: int, make: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Models from the local index, or None when the index cannot answer
+    (year outside the snapshot, or a make/year it has no rows for).
+    """
+    index = _load_index()
+    years = index.get("years") or []
+    if not years or not years[0] <= year <= years[1]:
+        return None
+    models = index["makes"].get(" ".join(make.split()).upper(), {}).get(str(year))
+    if not models:
+        return None
+    return [
+        {"Make_Name": make, "Model_Name": model, "Body_Styles": styles, "Vehicle_Types": types}
+        for model, styles, types in models
+    ]
+
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Helper — returns list OR {"error": "..."}
 # ────────────────────────────────────────────────────────────────────────────────
@@ -51,7 +111,7 @@ def _fetch_from_nhtsa(
     )
 
     try:
-        resp = requests.get(url, timeout=15)
+        resp = upstream_http.get(url, timeout=15)
         resp.raise_for_status()
 
         data = resp.json()
@@ -66,6 +126,8 @@ def _fetch_from_nhtsa(
             if r.get("Model_Name")
         ]
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e: #pylint: disable=broad-exception-caught
         print(f"Error fetching data from NHTSA: {e}")
         return {"error": str(e)}
@@ -97,8 +159,14 @@ def handle(connection_id: str, tool_input: Dict[str, Any],
             toolResult=ToolResult(toolUseId=tool_use_id, content=[tb])
         )
 
-    # 2. Fetch data
-    result = _fetch_from_nhtsa(year_int, make)
+    # 2. Local index first; vPIC only for years / makes it does not cover
+    result = _from_index(year_int, make)
+    source = "nhtsa_dataset"
+    if result is None:
+        result = _fetch_from_nhtsa(year_int, make)
+        source = "vpic"
+    else:
+        tool_telemetry.mark_cache_hit()
 
     # 3. Error from API or connection issue
     if isinstance(result, dict) and "error" in result:
@@ -130,7 +198,8 @@ def handle(connection_id: str, tool_input: Dict[str, Any],
             "year": year_int,
             "make": make,
             "count": len(cars),
-            "vehicles": cars[:100],  # consistent with your original capping
+            "source": source,
+            "vehicles": cars[:MAX_MODELS],
         }
     )
 
@@ -1,17 +1,21 @@
 """Car Price Fetcher With Google API"""
 
 from typing import Dict, Any, List, Union
-import re
-import requests
+from urllib.parse import quote
 
 import json
-import boto3
+import time
 from botocore.exceptions import ClientError
 
-from pydantic_input_comps import (ToolResult,JsonContent,
+from pydantic_input_comps import (ToolResult,
     ToolInputSchema,ToolSpec,FullToolSpec)
 from pydantic_models import (
     ToolResultContentBlock,TextContentBlock)
+import aws_clients
+import price_cache
+import price_stats
+import upstream_http
+from upstream_http import UpstreamUnavailable
 
 
 def _get_secret(secret_name: str, region_name: str = "us-east-1") -> str | None:
@@ -20,8 +24,7 @@ def _get_secret(secret_name: str, region_name: str = "us-east-1") -> str | None:
     Returns the secret string (or JSON field if it's a dict).
     Falls back to os.getenv() for local runs.
     """
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=region_name)
+    client = aws_clients.client("secretsmanager", region_name=region_name)
 
     try:
         response = client.get_secret_value(SecretId=secret_name)
@@ -45,31 +48,36 @@ def _get_secret(secret_name: str, region_name: str = "us-east-1") -> str | None:
         print(f"[SecretsManager] Unexpected error: {e}")
         return None
 
-GOOGLE_API_KEY = _get_secret("GOOGLE_API_KEY")
-GOOGLE_CX      = _get_secret("GOOGLE_CX")
+_google_credentials: Dict[str, str] = {}
 
-if not GOOGLE_API_KEY or not GOOGLE_CX:
-    raise EnvironmentError(
-        "Missing GOOGLE_API_KEY or GOOGLE_CX. "
-        "Set in AWS Secrets Manager or .env file."
-    )
+def _get_google_credentials() -> Dict[str, str]:
+    """
+    Fetch GOOGLE_API_KEY / GOOGLE_CX on first use rather than at import time,
+    so loading this module costs no Secrets Manager round trips.
+    """
+    if not _google_credentials:
+        api_key = _get_secret("GOOGLE_API_KEY")
+        cx = _get_secret("GOOGLE_CX")
+        if not api_key or not cx:
+            raise EnvironmentError(
+                "Missing GOOGLE_API_KEY or GOOGLE_CX. "
+                "Set in AWS Secrets Manager or .env file."
+            )
+        _google_credentials.update({"key": api_key, "cx": cx})
+    return _google_credentials
 
 
 
 
-def prompt():
-    """Tool-specific summarisation prompt – returns ONE estimated price."""
-    p = (
-        "You are given JSON with a list of price strings (price_strings) and source titles/links. "
-        "Follow these steps exactly and output **only** the final sentence:\n"
-        "1. Collect every dollar amount from `price_strings` and from any price mentioned in `sources.title` or `sources.link`.\n"
-        "2. Remove any price < $500 or > $40,000 (junk or new-car MSRP).\n"
-        "3. From the remaining numbers take the **median** (middle value when sorted).\n"
-        "5. Output **exactly one sentence** in this format, nothing else:\n"
-        "   'A <year> <make> <model> is worth $<rounded_median> in average condition.'\n"
-        "Do NOT include ranges, explanations, JSON, or any other text."
-    )
-    return p
+TIMEOUT_SECONDS = 20  # one Google search (plus one retry on 429); no summary call
+SEARCH_TIMEOUT_SECONDS = 12.0
+RATE_LIMIT_BACKOFF_SECONDS = 2.0  # wait before the one retry after a 429
+MIN_RETRY_TIMEOUT_SECONDS = 2.0   # skip the retry if the deadline leaves less than this
+DEADLINE_MARGIN_SECONDS = 1.0     # parsing + cache write after the last request
+
+# The median is computed in price_stats, so the result is already a final
+# sentence and dispatch skips the small-model summarizer for this tool.
+SUMMARIZE = False
 
 # ────────────────────────────────────────────────────────────────────────────────
 # TOOL SPEC
@@ -79,8 +87,8 @@ SPEC = FullToolSpec(
         name="google_vehicle_price_lookup",
         description=(
             "Look up retail / trade-in price estimates for a vehicle using "
-            "Google Custom Search (NADA, Edmunds, KBB). Returns low/high USD "
-            "range extracted from search snippets."
+            "Google Custom Search (NADA, Edmunds, KBB). Returns one median USD "
+            "value with a typical range, computed from the search snippets."
         ),
         inputSchema=ToolInputSchema(
             json={
@@ -98,6 +106,24 @@ SPEC = FullToolSpec(
 ).model_dump(by_alias=True)
 
 
+# ────────────────────────────────────────────────────────────────────────────────
+# Helper – one metered request
+# ────────────────────────────────────────────────────────────────────────────────
+def _send_search(url: str, timeout: float):
+    """
+    Send one Custom Search request, charging it to today's quota first.
+    None when the quota is spent; a request the breaker / bulkhead refuses
+    was never sent, so its unit is refunded before UpstreamUnavailable propagates.
+    """
+    if not price_cache.consume_quota():
+        return None
+    try:
+        return upstream_http.get(url, timeout=timeout)
+    except UpstreamUnavailable:
+        price_cache.refund_quota()
+        raise
+
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Helper – single Google search + price extraction
 # ────────────────────────────────────────────────────────────────────────────────
@@ -107,7 +133,12 @@ def _google_price_search(
     """
     Returns either a dict with pricing data or an error dict.
     """
-    if GOOGLE_API_KEY.startswith("YOUR_") or GOOGLE_CX.startswith("YOUR_"):
+    deadline = time.monotonic() + TIMEOUT_SECONDS - DEADLINE_MARGIN_SECONDS
+    try:
+        creds = _get_google_credentials()
+    except EnvironmentError as exc:
+        return {"error": str(exc)}
+    if creds["key"].startswith("YOUR_") or creds["cx"].startswith("YOUR_"):
         return {"error": "Google API key / CX not set (use env vars)."}
 
     # Build the exact query we want Google to run
@@ -118,61 +149,53 @@ def _google_price_search(
 
     url = (
         f"https://www.googleapis.com/customsearch/v1?"
-        f"key={GOOGLE_API_KEY}&cx={GOOGLE_CX}&q={requests.utils.quote(q)}&num=10"
+        f"key={creds['key']}&cx={creds['cx']}&q={quote(q)}&num=10"
     )
 
     try:
-        r = requests.get(url, timeout=12)
+        r = _send_search(url, SEARCH_TIMEOUT_SECONDS)
+        if r is None:
+            return {"error": price_cache.QUOTA_EXHAUSTED_MESSAGE, "quota_exhausted": True}
+        if r.status_code == 429:
+            # per-100-seconds limit, not the daily quota: back off once if the tool
+            # deadline leaves room, then let the cache answer stale rather than
+            # pausing searches for the day
+            retry_timeout = min(SEARCH_TIMEOUT_SECONDS,
+                                deadline - time.monotonic() - RATE_LIMIT_BACKOFF_SECONDS)
+            if retry_timeout >= MIN_RETRY_TIMEOUT_SECONDS:
+                time.sleep(RATE_LIMIT_BACKOFF_SECONDS)
+                r = _send_search(url, retry_timeout) or r
         if r.status_code == 403:
-            return {"error": "Quota exceeded or invalid API key (100 free / day)."}
+            return {"error": "Quota exceeded or invalid API key (100 free / day).",
+                    "quota_exhausted": True}
         if r.status_code == 429:
-            return {"error": "Rate-limit hit (100 q / 100 s)."}
+            return {"error": "Rate-limit hit (100 q / 100 s); try again shortly."}
         r.raise_for_status()
         data = r.json()
 
-        # ---- extract price strings from snippets ----
-        price_strings: List[str] = []
+        # ---- extract prices from titles + snippets, remembering the source ----
+        observations: List[Dict[str, Any]] = []
         sources: List[Dict[str, str]] = []
-        for item in data.get("items", []):
-            snippet = item.get("snippet", "")
+        for idx, item in enumerate(data.get("items", [])):
             sources.append({"title": item.get("title", ""), "link": item.get("link", "")})
-            price_strings.extend(re.findall(r'\$[\d,]+(?:\s*-\s*\$[\d,]+)?', snippet))
+            text = f"{item.get('title', '')} {item.get('snippet', '')}"
+            observations.extend(price_stats.extract_prices(text, source=idx))
 
-        if not price_strings:
+        if not observations:
             return {
                 "query_used": q,
                 "message": "No price data in top results.",
                 "sources": sources[:5],
             }
 
-        # ---- parse to numbers, low / high ----
-        def _to_int(p: str) -> List[int]:
-            nums = []
-            for part in p.replace(" - ", "-").split("-"):
-                clean = re.sub(r"[^\d]", "", part.strip())
-                if clean:
-                    nums.append(int(clean))
-            return nums
-
-        all_nums = [n for s in price_strings for n in _to_int(s)]
-        low = min(all_nums)
-        high = max(all_nums)
-
-        # plain-text summary (your style)
-        summary = (
-            f"{make} {model or ''} {year} price range: ${low:,} – ${high:,} USD "
-            f"(sources: {', '.join([s['title'][:50] for s in sources[:3]])})"
-        )
-
         return {
             "query_used": q,
-            "low_estimate_usd": low,
-            "high_estimate_usd": high,
-            "summary": summary,
-            "price_strings": price_strings[:10],
-            "sources": sources[:5],
+            "observations": observations,
+            "sources": sources,
         }
 
+    except UpstreamUnavailable as exc:
+        return {"error": str(exc), "upstream_unavailable": True}
     except Exception as exc: #pylint: disable=broad-exception-caught
         return {"error": str(exc)}
 
@@ -203,8 +226,9 @@ def handle(connection_id: str, tool_input: Dict[str, Any], tool_use_id: str) ->
             )
         )
 
-    # ---- perform search ----
-    cont = _google_price_search(year_int, make, model)
+    # ---- perform search (cached, quota-aware, coalesced) ----
+    cont = price_cache.lookup(year_int, make, model,
+                              lambda: _google_price_search(year_int, make, model))
 
     if "error" in cont:
         return ToolResultContentBlock(
@@ -214,19 +238,16 @@ def handle(connection_id: str, tool_input: Dict[str, Any], tool_use_id: str) ->
             )
         )
 
-    # ---- success payload ----
-    payload = {
-        "year": year_int,
-        "make": make,
-        "model": model,
-        "pricing": cont,
-        # "quota_info": "Free tier: 100 queries / day. Paid: $5 per 1000 beyond free.",
-    }
+    # ---- deterministic statistics → one sentence ----
+    stats = price_stats.summarize_prices(cont.get("observations", []))
+    sentence = price_stats.price_sentence(year_int, make, model, stats, cont.get("sources", []))
+    if cont.get("cached_at") and cont.get("stale"):
+        sentence += f" (Last known price from {cont['cached_at']}; live lookups are paused.)"
 
     return ToolResultContentBlock(
         toolResult=ToolResult(
             toolUseId=tool_use_id,
-            content=[JsonContent(json=payload)],
+            content=[TextContentBlock(text=sentence)],
         )
     )
 
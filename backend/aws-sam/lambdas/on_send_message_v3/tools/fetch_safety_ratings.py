@@ -1,13 +1,17 @@
 """API request fool for fetching saftey ratings"""
 # tools/fetch_safety_ratings.py
 from typing import Dict, List, Any, Union
-import requests
 from pydantic_input_comps import (JsonContent, ToolResult,
                              ToolInputSchema, ToolSpec, FullToolSpec)
 from pydantic_models import (ToolResultContentBlock, TextContentBlock)
+import nhtsa_table
+import upstream_http
+from upstream_http import UpstreamUnavailable
 
 
 HandleReturnType = List[Union[JsonContent, TextContentBlock]]
+TIMEOUT_SECONDS = 35  # up to 3 summary-endpoint queries + one detail call per VehicleId
+
 def prompt():
     """Returns Tool Specific Prompt""" 
     p = "Extract the essential meaning from this JSON data and rewrite it as a brief"+\
@@ -45,7 +49,7 @@ def _query_summary(year: int, make: str, model: str) -> List[Dict[str, Any]]:
         f"https://api.nhtsa.gov/SafetyRatings/modelyear/{year}"
         f"/make/{make}/model/{model}?format=json"
     )
-    resp = requests.get(url, timeout=10)
+    resp = upstream_http.get(url, timeout=10)
     resp.raise_for_status()
     return resp.json().get("Results", [])
 
@@ -53,7 +57,7 @@ def _query_summary(year: int, make: str, model: str) -> List[Dict[str, Any]]:
 def _query_vehicle_detail(vehicle_id: int) -> Dict[str, Any]:
     """Return the first (and only) result for a specific VehicleId."""
     url = f"https://api.nhtsa.gov/SafetyRatings/VehicleId/{vehicle_id}?format=json"
-    resp = requests.get(url, timeout=10)
+    resp = upstream_http.get(url, timeout=10)
     resp.raise_for_status()
     all_results = resp.json().get("Results", [])
     return all_results[0] if all_results else {}
@@ -72,6 +76,8 @@ def _fetch_safety_rating(year: int, make: str, model: str) -> Dict[str, Any]:
         for alt in (year + 1, year - 1):
             try:
                 results = _query_summary(alt, make, model)
+            except UpstreamUnavailable:
+                raise
             except Exception: #pylint: disable=broad-exception-caught
                 results = []
             if results:
@@ -99,6 +105,8 @@ def _fetch_safety_rating(year: int, make: str, model: str) -> Dict[str, Any]:
 
         try:
             detail = _query_vehicle_detail(vid)
+        except UpstreamUnavailable:
+            raise
         except Exception as e: #pylint: disable=broad-exception-caught
             detail = {}
             detail["error"] = f"Failed to fetch VehicleId {vid}: {e}"
@@ -122,6 +130,27 @@ def _fetch_safety_rating(year: int, make: str, model: str) -> Dict[str, Any]:
         "ratings": ratings
     }
 
+def _ratings_from_table(year: int, make: str, model: str) -> Dict[str, Any]:
+    """
+    Overall star ratings from our nhtsa_data table, for when api.nhtsa.gov is
+    unavailable. Same shape as _fetch_safety_rating; count 0 if the table has none.
+    """
+    rows = nhtsa_table.find_vehicles(make=make, model=model, years=year)
+    ratings = [{
+        "VehicleDescription": " ".join(p for p in (r.get("BODY_STYLE"), r.get("DRIVE_TRAIN")) if p),
+        "OverallRating": r.get("OVERALL_STARS") or "Not Rated",
+    } for r in rows]
+    return {
+        "year": year,
+        "make": make,
+        "model": model,
+        "count": len(ratings),
+        "ratings": ratings,
+        "source": "nhtsa_data",
+        "note": "Live NHTSA service unavailable; overall ratings only, from our copy of NHTSA data.",
+    }
+
+
 def handle(connection_id: str, tool_input: Dict[str, Any], tool_use_id: str) -> ToolResultContentBlock:
     """
     Handle safety rating lookup and ALWAYS return a ToolResultContentBlock.
@@ -148,6 +177,15 @@ def handle(connection_id: str, tool_input: Dict[str, Any], tool_use_id: str) ->
     # ---------------------------
     try:
         result = _fetch_safety_rating(int(year), make, model)
+    except UpstreamUnavailable:
+        # Open circuit / full bulkhead: fall back to our table before giving up
+        try:
+            result = _ratings_from_table(int(year), make, model)
+        except Exception as e: #pylint: disable=broad-exception-caught
+            print(f"nhtsa_data fallback failed: {e}")
+            result = None
+        if not result or not result["count"]:
+            raise
     except Exception as e: #pylint: disable=broad-exception-caught
         tb = TextContentBlock(text=f"Unexpected failure while querying safety ratings: {e}")
         return ToolResultContentBlock(
@@ -0,0 +1,273 @@
+"""Ranks every vehicle in the local NHTSA dataset against weighted preferences"""
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pydantic_input_comps import (ToolResult, JsonContent, ToolInputSchema,
+                                  ToolSpec, FullToolSpec)
+from pydantic_models import ToolResultContentBlock
+from vehicle_snapshot import VehicleSnapshot, open_snapshot
+
+TIMEOUT_SECONDS = 5  # local NumPy scoring, no network
+MAX_RESULT_TOKENS = 1500  # k rows with per-component explanations
+PRESERVE_ORDER = True  # rows are ranked by score; the payload budget must not reorder them
+SUMMARIZE = False  # the ranked JSON is already compact; the main model phrases it
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 10
+CANDIDATE_FACTOR = 8  # rows pre-selected per result so duplicate trims can be dropped
+
+def prompt():
+    """Returns Tool Specific Prompt"""
+    return "Summarize the ranked vehicles and why each one scored the way it did."
+
+# ────────────────────────────────────────────────────────────────────────────────
+# VOCABULARY — canonical bitflags, as written by backend/data/vehicle_values.py
+# ────────────────────────────────────────────────────────────────────────────────
+DRIVE_FLAGS = {"FWD": 1, "RWD": 2, "AWD": 4, "4WD": 8, "2WD": 16}
+BODY_FLAGS = {"car": 1, "suv": 2, "truck": 4, "van": 8}  # MPV rows carry suv and van
+
+COMPONENTS = ("make", "drive_train", "body", "seats", "safety", "year")
+# Safety and recency always count a little; the rest only once the user states a preference
+DEFAULT_WEIGHTS = {"make": 1.0, "drive_train": 1.0, "body": 1.0, "seats": 1.0,
+                   "safety": 1.0, "year": 0.5}
+SEAT_TOLERANCE = 4.0  # seats away from the wanted count at which the score reaches 0
+YEAR_TOLERANCE = 10.0  # model years away from the target at which the score reaches 0
+
+# ────────────────────────────────────────────────────────────────────────────────
+# TOOL SPEC
+# ────────────────────────────────────────────────────────────────────────────────
+_WEIGHT = {"type": "number", "minimum": 0, "maximum": 10}
+SPEC = FullToolSpec(
+    toolSpec=ToolSpec(
+        name="recommend_vehicles",
+        description=(
+            "Rank every vehicle in the NHTSA dataset against the user's preferences "
+            "(makes, drive train, body type, seats, safety, model year) and return the "
+            "top matches with a per-preference score breakdown. Use it to shortlist "
+            "candidates instead of listing models make by make."
+        ),
+        inputSchema=ToolInputSchema(
+            json={
+                "type": "object",
+                "properties": {
+                    "makes": {"type": "array", "items": {"type": "string"},
+                              "description": "Preferred manufacturers (e.g., [\"TOYOTA\", \"HONDA\"])"},
+                    "drive_trains": {"type": "array",
+                                     "items": {"type": "string", "enum": list(DRIVE_FLAGS)},
+                                     "description": "Acceptable drive trains"},
+                    "body_types": {"type": "array",
+                                   "items": {"type": "string", "enum": list(BODY_FLAGS)},
+                                   "description": "Acceptable body types"},
+                    "seats": {"type": "integer", "minimum": 1, "maximum": 15,
+                              "description": "Number of seats needed"},
+                    "year": {"type": "integer",
+                             "description": "Target model year (default: newest is best)"},
+                    "min_year": {"type": "integer",
+                                 "description": "Exclude anything older than this model year"},
+                    "weights": {
+                        "type": "object",
+                        "properties": {c: _WEIGHT for c in COMPONENTS},
+                        "additionalProperties": False,
+                        "description": "Importance 0-10 per preference (default 1, year 0.5)",
+                    },
+                    "top_k": {"type": "integer", "minimum": 1, "maximum": MAX_TOP_K},
+                },
+                "additionalProperties": False,
+            }
+        ),
+    )
+).model_dump(by_alias=True)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# DATASET — snapshot mapped once per container; columns are views, not copies
+# ────────────────────────────────────────────────────────────────────────────────
+class _Dataset:
+    """Scoring arrays over the mapped vehicle snapshot; row i of every array is the same vehicle."""
+
+    def __init__(self, snapshot: VehicleSnapshot):
+        flags = snapshot.header.get("flags", {})
+        if flags.get("DRIVE_FLAGS") != DRIVE_FLAGS or flags.get("BODY_FLAGS") != BODY_FLAGS:
+            raise ValueError("Vehicle snapshot was built with different drive/body flags")
+        self.snapshot = snapshot
+        self.size = snapshot.rows
+        self.make_names: List[str] = snapshot.dictionary("MAKE")
+        self.make = snapshot.column("MAKE")
+        self.model = snapshot.column("MODEL")
+        self.year = snapshot.column("MODEL_YR")
+        self.stars = snapshot.column("OVERALL_STARS")
+        self.drive = snapshot.column("DRIVE_FLAGS")
+        self.body = snapshot.column("BODY_FLAGS")
+        self.seat_min = snapshot.column("SEATS_MIN").astype(np.int16)  # signed: gaps go negative
+        self.seat_max = snapshot.column("SEATS_MAX").astype(np.int16)
+
+        known_years = self.year[self.year > 0]
+        self.year_lo = int(known_years.min()) if known_years.size else 0
+        self.year_hi = int(known_years.max()) if known_years.size else 0
+
+    def text(self, column: str, i: int) -> str:
+        """Raw string value of one cell, whitespace-collapsed."""
+        return " ".join(self.snapshot.value(column, i).split())
+
+
+_dataset: Optional[_Dataset] = None
+_dataset_lock = threading.Lock()
+
+
+def _load() -> _Dataset:
+    global _dataset #pylint: disable=global-statement
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = _Dataset(open_snapshot())
+    return _dataset
+
+
+def prime() -> None:
+    """Load the dataset ahead of the first call (picked up by warmup)."""
+    _load()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# SCORING — one float32 array per component, each in [0, 1]
+# ────────────────────────────────────────────────────────────────────────────────
+def _component_scores(data: _Dataset, prefs: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    scores: Dict[str, np.ndarray] = {}
+
+    makes = {str(m).strip().upper() for m in prefs.get("makes") or []}
+    if makes:
+        codes = [i for i, name in enumerate(data.make_names) if name in makes]
+        scores["make"] = np.isin(data.make, codes).astype(np.float32)
+
+    drive_mask = sum(DRIVE_FLAGS[d] for d in set(prefs.get("drive_trains") or []))
+    if drive_mask:
+        scores["drive_train"] = ((data.drive & drive_mask) != 0).astype(np.float32)
+
+    body_mask = sum(BODY_FLAGS[b] for b in set(prefs.get("body_types") or []))
+    if body_mask:
+        scores["body"] = ((data.body & body_mask) != 0).astype(np.float32)
+
+    if prefs.get("seats"):
+        seats = int(prefs["seats"])
+        # Distance to the nearest offered seat count; unknown seating scores 0
+        gap = np.maximum(data.seat_min - seats, 0) + np.maximum(seats - data.seat_max, 0)
+        fit = np.clip(1.0 - gap / SEAT_TOLERANCE, 0.0, 1.0)
+        scores["seats"] = np.where(data.seat_max > 0, fit, 0.0).astype(np.float32)
+
+    scores["safety"] = (data.stars / np.float32(5.0)).astype(np.float32)
+
+    if prefs.get("year"):
+        distance = np.abs(data.year.astype(np.float32) - int(prefs["year"]))
+        scores["year"] = np.clip(1.0 - distance / YEAR_TOLERANCE, 0.0, 1.0).astype(np.float32)
+    else:
+        span = max(data.year_hi - data.year_lo, 1)
+        scores["year"] = np.clip((data.year - data.year_lo) / span, 0.0, 1.0).astype(np.float32)
+
+    return scores
+
+
+def _weights(prefs: Dict[str, Any], components) -> Dict[str, float]:
+    requested = prefs.get("weights") or {}
+    return {c: float(requested.get(c, DEFAULT_WEIGHTS[c])) for c in components}
+
+
+def _top_rows(total: np.ndarray, data: _Dataset, k: int) -> List[int]:
+    """Best k rows, one per make/model/year (trims of the same vehicle share a score)."""
+    candidates = min(data.size, k * CANDIDATE_FACTOR)
+    while True:
+        if candidates < data.size:
+            picked = np.argpartition(-total, candidates - 1)[:candidates]
+        else:
+            picked = np.arange(data.size)
+        picked = picked[np.argsort(-total[picked], kind="stable")]
+
+        chosen: List[int] = []
+        seen = set()
+        for i in picked.tolist():
+            if total[i] <= 0:
+                break
+            key = (data.make[i], data.model[i], data.year[i])
+            if key not in seen:
+                seen.add(key)
+                chosen.append(i)
+                if len(chosen) == k:
+                    return chosen
+        if candidates >= data.size:
+            return chosen
+        candidates = min(data.size, candidates * 4)
+
+
+def _describe(data: _Dataset, i: int, scores: Dict[str, np.ndarray],
+              weights: Dict[str, float], weight_sum: float) -> Dict[str, Any]:
+    values = {
+        "make": data.make_names[int(data.make[i])],
+        "drive_train": data.text("DRIVE_TRAIN", i) or "unknown",
+        "body": [b for b, bit in BODY_FLAGS.items() if data.body[i] & bit] or "unknown",
+        "seats": data.text("NUM_OF_SEATING", i) or "unknown",
+        "safety": f"{data.stars[i]} stars" if data.stars[i] else "not rated",
+        "year": int(data.year[i]),
+    }
+    explanation = {
+        c: {"value": values[c], "match": round(float(scores[c][i]), 2),
+            "points": round(100 * weights[c] * float(scores[c][i]) / weight_sum, 1)}
+        for c in scores if weights[c] > 0
+    }
+    return {
+        "make": values["make"],
+        "model": data.text("MODEL", i),
+        "year": values["year"],
+        "body_style": data.text("BODY_STYLE", i),
+        "overall_stars": int(data.stars[i]) or None,
+        "explanation": explanation,
+    }
+
+
+def recommend(prefs: Dict[str, Any]) -> Dict[str, Any]:
+    """Score every row and return the top matches as a JSON-ready dict."""
+    data = _load()
+    k = min(int(prefs.get("top_k") or DEFAULT_TOP_K), MAX_TOP_K)
+
+    scores = _component_scores(data, prefs)
+    weights = _weights(prefs, scores)
+    weight_sum = sum(weights.values())
+    if weight_sum <= 0:
+        return {"error": "All preference weights are zero; nothing to rank by."}
+
+    total = np.zeros(data.size, dtype=np.float32)
+    for component, score in scores.items():
+        if weights[component]:
+            total += np.float32(weights[component]) * score
+    total /= np.float32(weight_sum)
+    if prefs.get("min_year"):
+        total[data.year < int(prefs["min_year"])] = 0.0
+
+    rows = _top_rows(total, data, k)
+    results = []
+    for i in rows:
+        described = _describe(data, i, scores, weights, weight_sum)
+        results.append({"score": round(100 * float(total[i]), 1), **described})
+    return {
+        "scored": data.size,
+        "weights": {c: w for c, w in weights.items() if w > 0},
+        "count": len(results),
+        "vehicles": results,
+    }
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# TOOL ENTRYPOINT — Always returns ToolResultContentBlock
+# ────────────────────────────────────────────────────────────────────────────────
+def handle(connection_id: str, tool_input: Dict[str, Any],
+           tool_use_id: str) -> ToolResultContentBlock: #pylint: disable=unused-argument
+    """Rank vehicles for the given preferences."""
+    try:
+        result = recommend(tool_input or {})
+    except (OSError, ValueError) as e:
+        print(f"recommend_vehicles failed: {e}")
+        result = {"error": f"Vehicle dataset unavailable: {e}"}
+
+    if not result.get("error") and not result["vehicles"]:
+        result["message"] = "No vehicles matched these preferences."
+    jc = JsonContent(json=result)
+    return ToolResultContentBlock(toolResult=ToolResult(toolUseId=tool_use_id, content=[jc]))
@@ -0,0 +1,203 @@
+"""Shared HTTP layer for the tool modules.
+
+Every outbound call goes through get(), which applies, per upstream host:
+  - a circuit breaker (closed / open / half-open) driven by error rate and
+    slow-call rate over a sliding window of recent calls, and
+  - a bulkhead capping concurrent in-flight requests to that host.
+An open circuit or a full bulkhead raises UpstreamUnavailable immediately
+instead of letting the caller wait out the request timeout.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+BULKHEAD_WAIT_SECONDS = float(os.getenv("UPSTREAM_BULKHEAD_WAIT_SECONDS", "2"))
+
+
+class UpstreamUnavailable(Exception):
+    """Raised without touching the network when an upstream is known to be unhealthy."""
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"{upstream} is temporarily unavailable ({reason}).")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Error-rate / latency circuit breaker over the last `window` calls."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 20, min_calls: int = 5, error_rate: float = 0.5,
+                 slow_call_seconds: float = 5.0, slow_rate: float = 0.6,
+                 open_seconds: float = 30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may proceed. In half-open state only one probe is let through."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Record the outcome of a call that allow() let through."""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._trip()
+                else:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((failed, slow))
+            if len(self._calls) < self.min_calls:
+                return
+            total = len(self._calls)
+            failures = sum(1 for f, _ in self._calls if f)
+            slows = sum(1 for _, s in self._calls if s)
+            if failures / total >= self.error_rate or slows / total >= self.slow_rate:
+                self._trip()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that never went out."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+
+class Upstream:
+    """Breaker + bulkhead for one host."""
+    def __init__(self, name: str, max_concurrent: int, **breaker_kwargs):
+        self.name = name
+        self.breaker = CircuitBreaker(**breaker_kwargs)
+        self.bulkhead = threading.BoundedSemaphore(max_concurrent)
+
+
+_UPSTREAMS: Dict[str, Upstream] = {
+    "api.nhtsa.gov": Upstream("api.nhtsa.gov", max_concurrent=4, slow_call_seconds=5.0),
+    "vpic.nhtsa.dot.gov": Upstream("vpic.nhtsa.dot.gov", max_concurrent=4, slow_call_seconds=5.0),
+    "www.fueleconomy.gov": Upstream("www.fueleconomy.gov", max_concurrent=4, slow_call_seconds=6.0),
+    "www.googleapis.com": Upstream("www.googleapis.com", max_concurrent=2, slow_call_seconds=5.0),
+}
+_upstreams_lock = threading.Lock()
+
+# One pooled session for all tools, so connections to each host are reused
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=10))
+
+# (url, timeout, **kwargs) -> Response. Swapped out by http_fixtures for record/replay.
+Transport = Callable[..., requests.Response]
+
+
+def _network_transport(url: str, timeout: float, **kwargs) -> requests.Response:
+    return _session.get(url, timeout=timeout, **kwargs)
+
+
+_transport: Transport = _network_transport
+
+
+def set_transport(transport: Transport) -> None:
+    """Route every tool request through `transport` instead of the network."""
+    global _transport #pylint: disable=global-statement
+    _transport = transport
+
+
+def reset_transport() -> None:
+    """Go back to real network requests."""
+    set_transport(_network_transport)
+
+
+def network_transport() -> Transport:
+    """The real network transport, for wrappers (e.g. the fixture recorder)."""
+    return _network_transport
+
+
+def warm_connections(timeout: float = 2.0) -> None:
+    """
+    Open a pooled connection to every known upstream (TLS included) so the first
+    tool call skips the handshake. Bypasses breakers; failures are ignored.
+    No-op while a record/replay transport is installed.
+    """
+    if _transport is not _network_transport:
+        return
+
+    def _touch(host: str) -> None:
+        try:
+            _session.head(f"https://{host}/", timeout=timeout, allow_redirects=False)
+        except requests.RequestException:
+            pass
+
+    threads = [threading.Thread(target=_touch, args=(host,), daemon=True) for host in _UPSTREAMS]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout + 1)
+
+
+def upstream_for(url: str) -> Upstream:
+    """The Upstream guarding this URL's host (created with defaults for unknown hosts)."""
+    host = urlsplit(url).hostname or "unknown"
+    upstream = _UPSTREAMS.get(host)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _UPSTREAMS.setdefault(host, Upstream(host, max_concurrent=4))
+    return upstream
+
+
+def get(url: str, timeout: float = 10, **kwargs) -> requests.Response:
+    """
+    requests.get() through the upstream's breaker and bulkhead.
+    Raises UpstreamUnavailable when the circuit is open or the bulkhead stays full.
+    """
+    upstream = upstream_for(url)
+    if not upstream.breaker.allow():
+        raise UpstreamUnavailable(upstream.name, "circuit open")
+    if not upstream.bulkhead.acquire(timeout=BULKHEAD_WAIT_SECONDS):
+        upstream.breaker.release()
+        raise UpstreamUnavailable(upstream.name, "too many concurrent requests")
+
+    started = time.monotonic()
+    try:
+        resp = _transport(url, timeout=timeout, **kwargs)
+    except Exception:
+        upstream.breaker.record(failed=True, latency=time.monotonic() - started)
+        raise
+    finally:
+        upstream.bulkhead.release()
+
+    # 4xx other than 429 means the host is up and answered; only count server-side trouble
+    failed = resp.status_code >= 500 or resp.status_code == 429
+    upstream.breaker.record(failed=failed, latency=time.monotonic() - started)
+    return resp
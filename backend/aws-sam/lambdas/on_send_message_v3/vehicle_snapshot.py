@@ -0,0 +1,104 @@
+"""Read-only, memory-mapped view of the vehicle snapshot built by backend/data/build_vehicle_snapshot.py.
+
+Columns are NumPy views straight over the mapped file (nothing is copied or
+parsed when the file is opened); dictionary strings are decoded the first
+time a column's dictionary is asked for.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_PATH = os.getenv(
+    "VEHICLE_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nhtsa_vehicles.snap"),
+)
+
+MAGIC = b"NHTSNAP1"
+SUPPORTED_VERSION = 2  # adds canonical SEATS_MIN/MAX, DRIVE_FLAGS, BODY_FLAGS columns
+_PREFIX = len(MAGIC) + 4
+
+
+class VehicleSnapshot:
+    """Columns, dictionaries and the make/year group index of one snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a vehicle snapshot")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        self.header = json.loads(self._mm[_PREFIX:_PREFIX + header_len])
+        if self.header.get("version") != SUPPORTED_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')}")
+        self._data_start = _PREFIX + header_len + (-(_PREFIX + header_len) % 8)
+        self.rows: int = self.header["rows"]
+        self._groups: Optional[Dict[Tuple[int, int], Tuple[int, int]]] = None
+
+    def _array(self, ref: dict) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=np.dtype(ref["dtype"]), count=ref["count"],
+                             offset=self._data_start + ref["offset"])
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only array for a column (dictionary codes for string columns)."""
+        return self._array(self.header["columns"][name])
+
+    @lru_cache(maxsize=None)
+    def dictionary(self, name: str) -> List[str]:
+        """Sorted distinct values of a string column; codes index into this list."""
+        ref = self.header["dictionaries"][name]
+        offsets = self._array(ref["offsets"]).tolist()
+        start = self._data_start + ref["blob"]["offset"]
+        blob = self._mm[start:start + ref["blob"]["length"]]  # offsets are byte positions
+        return [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def value(self, name: str, row: int) -> str:
+        """Decoded string of one cell."""
+        return self.dictionary(name)[int(self.column(name)[row])]
+
+    def code(self, name: str, value: str) -> Optional[int]:
+        """Dictionary code of a string value, or None if it never occurs."""
+        return self._codes(name).get(value)
+
+    @lru_cache(maxsize=None)
+    def _codes(self, name: str) -> Dict[str, int]:
+        return {v: i for i, v in enumerate(self.dictionary(name))}
+
+    def rows_for(self, make: str, year: Optional[int] = None) -> slice:
+        """Row range of one make (optionally one model year); empty if absent."""
+        if self._groups is None:
+            g = self.header["groups"]
+            self._groups = {
+                (m, y): (a, b)
+                for m, y, a, b in zip(self._array(g["make"]).tolist(), self._array(g["year"]).tolist(),
+                                      self._array(g["start"]).tolist(), self._array(g["stop"]).tolist())
+            }
+        code = self.code("MAKE", make)
+        if code is None:
+            return slice(0, 0)
+        if year is not None:
+            start, stop = self._groups.get((code, int(year)), (0, 0))
+            return slice(start, stop)
+        spans = [span for (m, _), span in self._groups.items() if m == code]
+        if not spans:
+            return slice(0, 0)
+        return slice(min(a for a, _ in spans), max(b for _, b in spans))
+
+
+_snapshot: Optional[VehicleSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def open_snapshot() -> VehicleSnapshot:
+    """The container-wide snapshot, mapped on first use."""
+    global _snapshot #pylint: disable=global-statement
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = VehicleSnapshot(SNAPSHOT_PATH)
+    return _snapshot
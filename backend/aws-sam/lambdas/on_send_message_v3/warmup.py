@@ -0,0 +1,94 @@
+'''Primes a fresh container so its first user message is as fast as later ones'''
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import aws_clients
+import name_resolver
+import upstream_http
+from tools import all_tools, tool_specs, output_tool_specs
+from system_prompt_builder import build_system_prompt, load_appendix
+
+# Lambda init is capped at 10 s; network steps that run longer finish in the background
+NETWORK_BUDGET_SECONDS = float(os.getenv("WARMUP_NETWORK_BUDGET_SECONDS", "3"))
+
+_primed: Dict[str, float] = {}
+_prime_lock = threading.Lock()
+
+
+def _prime_tools() -> None:
+    # Imports every tool module, compiles input validators and builds both spec caches
+    tool_specs()
+    output_tool_specs()
+
+
+def _prime_prompts() -> None:
+    load_appendix()
+    build_system_prompt(tool_specs(), 0, 2)
+
+
+def _prime_datasets() -> None:
+    # Tools backed by local data expose prime() to load it ahead of the first call
+    for tool in all_tools():
+        loader = getattr(tool.module, "prime", None)
+        if callable(loader):
+            loader()
+
+
+def _prime_dynamodb() -> None:
+    # Any GetItem opens the pooled connection; the key does not need to exist
+    aws_clients.table("messages").get_item(Key={"connectionId": "__warmup__"})
+
+
+_LOCAL_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("tools", _prime_tools),
+    ("prompts", _prime_prompts),
+    ("datasets", _prime_datasets),
+    ("names", name_resolver.prime),
+]
+_NETWORK_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("bedrock", aws_clients.warm_bedrock),
+    ("dynamodb", _prime_dynamodb),
+    ("upstreams", upstream_http.warm_connections),
+]
+
+
+def _timed(name: str, step: Callable[[], None], timings: Dict[str, float]) -> None:
+    started = time.perf_counter()
+    try:
+        step()
+    except Exception as e: #pylint: disable=broad-exception-caught
+        print(f"Warm-up step {name} failed: {e}")
+    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def prime(network: bool = True) -> Dict[str, float]:
+    """
+    Run every priming step once per container and return step -> ms.
+    Local steps run in order; network steps run concurrently on daemon
+    threads, waited on for at most NETWORK_BUDGET_SECONDS in total (a step
+    still running is left to finish on its own and is missing from the
+    timings). Later calls return the first run's timings without repeating the work.
+    """
+    with _prime_lock:
+        if _primed and (not network or "bedrock" in _primed):
+            return dict(_primed)
+        timings: Dict[str, float] = {}
+        for name, step in _LOCAL_STEPS:
+            _timed(name, step, timings)
+        if network:
+            threads = [threading.Thread(target=_timed, args=(name, step, timings), daemon=True)
+                       for name, step in _NETWORK_STEPS]
+            for t in threads:
+                t.start()
+            deadline = time.monotonic() + NETWORK_BUDGET_SECONDS
+            for t in threads:
+                t.join(timeout=max(0.0, deadline - time.monotonic()))
+            timings = dict(timings)  # late steps keep writing to the original, not to _primed
+            late = [name for name, _ in _NETWORK_STEPS if name not in timings]
+            if late:
+                print(f"Warm-up steps still running after {NETWORK_BUDGET_SECONDS}s: {late}")
+        _primed.update(timings)
+        print(f"Warm-up complete: {timings}")
+        return dict(timings)
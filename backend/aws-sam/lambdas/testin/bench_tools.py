@@ -0,0 +1,98 @@
+"""Offline benchmark for the on_send_message_v3 tool handlers.
+
+Uses http_fixtures to record real upstream responses once and replay them
+deterministically afterwards, so tool timings can be compared run to run
+without network access.
+
+    python bench_tools.py record               # call the live APIs, write fixtures
+    python bench_tools.py replay -n 50         # replay, no network, no latency
+    python bench_tools.py replay --latency     # replay sleeping the recorded latency
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "on_send_message_v3"))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import upstream_http #pylint: disable=wrong-import-position
+from http_fixtures import Recorder, Replayer, DEFAULT_FIXTURE_DIR #pylint: disable=wrong-import-position
+from tools import get_tool #pylint: disable=wrong-import-position
+
+# (tool name, tool_input). The price tool is left out: it needs Google secrets and DynamoDB.
+CASES = [
+    ("fetch_models_of_make_year", {"year": 2020, "make": "Toyota"}),
+    ("fetch_models_of_make_year", {"year": 2022, "make": "Honda"}),
+    ("fetch_gas_mileage", {"year": 2020, "make": "Toyota", "model": "Camry"}),
+    ("fetch_gas_mileage", {"year": 2021, "make": "Ford", "model": "F150 Pickup 2WD"}),
+    ("fetch_safety_ratings", {"year": 2020, "make": "Toyota", "model": "Camry"}),
+    ("fetch_safety_ratings", {"year": 2019, "make": "Honda", "model": "Civic"}),
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_case(name, tool_input, iterations):
+    """Run one tool handler `iterations` times; returns (timings_ms, result_bytes)."""
+    handle = get_tool(name).module.handle
+    timings = []
+    size = 0
+    for i in range(iterations):
+        started = time.perf_counter()
+        block = handle("bench", tool_input, f"bench-{i}")
+        timings.append((time.perf_counter() - started) * 1000)
+        size = len(block.model_dump_json().encode("utf-8"))
+    return timings, size
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["record", "replay", "live"])
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--latency", action="store_true",
+                        help="replay with the latency observed while recording")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="multiplier applied to recorded latency")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        upstream_http.set_transport(Recorder(args.fixtures))
+        args.iterations = 1
+    elif args.mode == "replay":
+        upstream_http.set_transport(Replayer(args.fixtures, args.latency, args.speed))
+
+    rows = []
+    for name, tool_input in CASES:
+        timings, size = run_case(name, tool_input, args.iterations)
+        rows.append({
+            "tool": name,
+            "input": json.dumps(tool_input),
+            "n": len(timings),
+            "min_ms": round(min(timings), 2),
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "max_ms": round(max(timings), 2),
+            "result_bytes": size,
+        })
+
+    print(f"\n=== Tool benchmark ({args.mode}, fixtures: {os.path.abspath(args.fixtures)}) ===")
+    for row in rows:
+        print(f"{row['tool']:<28} {row['input']:<60} n={row['n']:<4} "
+              f"min={row['min_ms']:>9} p50={row['p50_ms']:>9} p95={row['p95_ms']:>9} "
+              f"max={row['max_ms']:>9} bytes={row['result_bytes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""Offline load harness for the on_send_message_v3 send-message path.
+
+Drives lambda_handler with many simulated WebSocket sessions at once. Bedrock,
+DynamoDB, API Gateway and the upstream vehicle APIs are replaced by in-process
+stand-ins with configurable latency, so no AWS account or network is needed.
+Reports p50/p95/p99 per stage, throughput, thread counts and peak RSS.
+
+    python load_test.py                                  # 20 sessions x 3 messages
+    python load_test.py --sessions 50 --messages 5 --model-ms 1200
+    python load_test.py --sessions 1 --messages 10       # one container's view
+    python load_test.py --fixtures ../testin/fixtures    # replay recorded upstream HTTP
+
+Note: a real Lambda container handles one invocation at a time. In-process
+concurrency here shows shared-state contention (pools, breakers, caches);
+use --sessions 1 for single-container memory sizing.
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "on_send_message_v3"))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.pop("AWS_LAMBDA_FUNCTION_NAME", None)  # no init-phase warm-up against real AWS
+
+import aws_clients #pylint: disable=wrong-import-position
+import emitter as emitter_module #pylint: disable=wrong-import-position
+import upstream_http #pylint: disable=wrong-import-position
+import bedrock_caller_v2 #pylint: disable=wrong-import-position
+import lambda_function #pylint: disable=wrong-import-position
+from http_fixtures import Replayer #pylint: disable=wrong-import-position
+
+VEHICLES = [
+    (2020, "Toyota", "Camry"), (2021, "Honda", "Civic"), (2019, "Ford", "Escape"),
+    (2022, "Subaru", "Outback"), (2018, "Mazda", "CX-5"), (2020, "Hyundai", "Elantra"),
+]
+USER_MESSAGES = [
+    "How safe is a {year} {make} {model}?",
+    "What mileage does the {year} {make} {model} get?",
+    "Compare safety and fuel economy for the {year} {make} {model}.",
+    "Which models did {make} sell in {year}?",
+]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# METRICS
+# ────────────────────────────────────────────────────────────────────────────────
+class Metrics:
+    """Thread-safe latency samples per stage (milliseconds) plus counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def observe(self, stage: str, ms: float) -> None:
+        """Record one latency sample for `stage`."""
+        with self._lock:
+            self.samples[stage].append(ms)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add `n` to the counter `name`."""
+        with self._lock:
+            self.counters[name] += n
+
+    @contextlib.contextmanager
+    def timed(self, stage: str):
+        """Context manager recording the wall time of its body under `stage`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - started) * 1000)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _sleep_ms(mean_ms: float) -> None:
+    if mean_ms > 0:
+        time.sleep(random.uniform(0.5, 1.5) * mean_ms / 1000)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# STAND-INS
+# ────────────────────────────────────────────────────────────────────────────────
+class FakeBedrock:
+    """
+    Scripted Converse: a user text turn gets toolUse blocks matching the
+    question, a tool-result turn gets a final text answer, and summarizer
+    calls (no toolConfig) get a one-line summary.
+    """
+
+    def __init__(self, metrics: Metrics, model_ms: float, summarizer_ms: float):
+        self.metrics = metrics
+        self.model_ms = model_ms
+        self.summarizer_ms = summarizer_ms
+
+    @staticmethod
+    def _response(content: List[Dict[str, Any]], stop: str) -> Dict[str, Any]:
+        return {
+            "output": {"message": {"role": "assistant", "content": content}},
+            "stopReason": stop,
+            "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+        }
+
+    @staticmethod
+    def _tool_uses(text: str) -> List[Dict[str, Any]]:
+        vehicle = next((v for v in VEHICLES if v[1] in text and v[2] in text), None)
+        year, make, model = vehicle or random.choice(VEHICLES)
+        names = []
+        if "safe" in text:
+            names.append("fetch_safety_ratings")
+        if "mileage" in text or "fuel" in text:
+            names.append("fetch_gas_mileage")
+        if "models" in text:
+            names.append("fetch_models_of_make_year")
+        uses = []
+        for name in names or ["fetch_safety_ratings"]:
+            tool_input = {"year": year, "make": make}
+            if name != "fetch_models_of_make_year":
+                tool_input["model"] = model
+            uses.append({"toolUse": {"toolUseId": f"tu-{uuid.uuid4().hex[:10]}",
+                                     "name": name, "input": tool_input}})
+        return uses
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        """Bedrock Converse stand-in."""
+        if "toolConfig" not in kwargs:
+            with self.metrics.timed("bedrock.summarizer"):
+                _sleep_ms(self.summarizer_ms)
+            return self._response([{"text": "Summary of the tool data."}], "end_turn")
+
+        with self.metrics.timed("bedrock.converse"):
+            _sleep_ms(self.model_ms)
+            last = kwargs["messages"][-1]
+            texts = [b["text"] for b in last.get("content", []) if "text" in b]
+            if last.get("role") == "user" and texts:
+                return self._response(self._tool_uses(" ".join(texts)), "tool_use")
+            return self._response([{"text": "Here is what I found about that vehicle."}],
+                                  "end_turn")
+
+
+class FakeMessagesTable:
+    """In-memory stand-in for the `messages` table (the operations db_tools_v2 uses)."""
+
+    def __init__(self, metrics: Metrics, db_ms: float):
+        self.metrics = metrics
+        self.db_ms = db_ms
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_item(self, Key, ProjectionExpression=None, **_kwargs): #pylint: disable=invalid-name
+        """GetItem stand-in (ProjectionExpression: plain attribute names only)."""
+        with self.metrics.timed("dynamodb.get_item"):
+            _sleep_ms(self.db_ms)
+            with self._lock:
+                item = copy.deepcopy(self._items.get(Key["connectionId"]))
+        if item is None:
+            return {}
+        if ProjectionExpression:
+            wanted = {a.strip() for a in ProjectionExpression.split(",")}
+            item = {k: v for k, v in item.items() if k in wanted}
+        return {"Item": item}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **_kwargs): #pylint: disable=invalid-name
+        """UpdateItem stand-in for list_append of messages and SET of a scalar."""
+        with self.metrics.timed("dynamodb.update_item"):
+            _sleep_ms(self.db_ms)
+            with self._lock:
+                item = self._items.setdefault(Key["connectionId"], dict(Key))
+                if "list_append" in UpdateExpression:
+                    item.setdefault("messages", []).extend(
+                        copy.deepcopy(ExpressionAttributeValues[":new"]))
+                else:
+                    attr, placeholder = [p.strip() for p in
+                                         UpdateExpression.replace("SET", "", 1).split("=")]
+                    item[attr] = ExpressionAttributeValues[placeholder]
+        return {}
+
+
+class FakeApiGw:
+    """post_to_connection stand-in; collects frame counts, bytes and tool events."""
+
+    def __init__(self, metrics: Metrics, post_ms: float):
+        self.metrics = metrics
+        self.post_ms = post_ms
+
+    def post_to_connection(self, ConnectionId, Data): #pylint: disable=invalid-name,unused-argument
+        """Record a frame; tool_finished events feed the per-tool latency stages."""
+        with self.metrics.timed("apigw.post"):
+            _sleep_ms(self.post_ms)
+        self.metrics.count("frames")
+        self.metrics.count("frame_bytes", len(Data))
+        frame = json.loads(Data)
+        if frame.get("type") == "tool_finished":
+            data = frame.get("data") or {}
+            self.metrics.observe(f"tool.{data.get('tool')}", data.get("latency_ms", 0))
+            if not data.get("ok"):
+                self.metrics.count("tool_errors")
+
+
+def _json_response(url: str, payload: Dict[str, Any]) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    resp._content = json.dumps(payload).encode("utf-8") #pylint: disable=protected-access
+    resp.encoding = "utf-8"
+    resp.url = url
+    return resp
+
+
+class SyntheticUpstreams:
+    """Transport answering vPIC, fueleconomy.gov and NHTSA ratings URLs with canned data."""
+
+    def __init__(self, metrics: Metrics, http_ms: float):
+        self.metrics = metrics
+        self.http_ms = http_ms
+
+    def __call__(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        host = upstream_http.upstream_for(url).name
+        with self.metrics.timed(f"http.{host}"):
+            _sleep_ms(self.http_ms)
+        if "GetModelsForMakeYear" in url:
+            return _json_response(url, {"Results": [
+                {"Make_ID": 448, "Make_Name": "Toyota", "Model_ID": 2000 + i,
+                 "Model_Name": f"Model {i}"} for i in range(40)]})
+        if "menu/options" in url:
+            return _json_response(url, {"menuItem": [{"text": "Auto (S8)", "value": "41234"}]})
+        if "fueleconomy.gov/ws/rest/vehicle/" in url:
+            return _json_response(url, {"vehicle": {
+                "make": "Toyota", "model": "Camry", "year": "2020", "fuelType1": "Regular Gasoline",
+                "city08": "28", "highway08": "39", "comb08": "32",
+                "co2TailpipeGpm": "277", "fuelCost08": "1250"}})
+        if "SafetyRatings/VehicleId/" in url:
+            return _json_response(url, {"Results": [{
+                "OverallRating": "5", "OverallFrontCrashRating": "4",
+                "OverallSideCrashRating": "5", "RolloverRating": "4",
+                "SidePoleCrashRating": "5", "SideBarrierRatingOverall": "5"}]})
+        if "SafetyRatings/modelyear/" in url:
+            return _json_response(url, {"Results": [
+                {"VehicleId": 14000 + i, "VehicleDescription": f"Trim {i} 4 DR FWD"}
+                for i in range(3)]})
+        raise requests.ConnectionError(f"No synthetic response for {url}")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# RESOURCE SAMPLING
+# ────────────────────────────────────────────────────────────────────────────────
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class Sampler(threading.Thread):
+    """Samples thread count and RSS every `interval` seconds until stopped."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.threads: List[int] = []
+        self.rss: List[float] = []
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.threads.append(threading.active_count())
+            rss = _rss_mb()
+            if rss is not None:
+                self.rss.append(rss)
+            self.stop_event.wait(self.interval)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# DRIVER
+# ────────────────────────────────────────────────────────────────────────────────
+def _install(args, metrics: Metrics) -> None:
+    bedrock = FakeBedrock(metrics, args.model_ms, args.summarizer_ms)
+    table = FakeMessagesTable(metrics, args.db_ms)
+    apigw = FakeApiGw(metrics, args.post_ms)
+    aws_clients.bedrock_runtime = lambda: bedrock
+    aws_clients.table = lambda name: table
+    aws_clients.apigw = lambda domain, stage: apigw
+    if args.fixtures:
+        upstream_http.set_transport(Replayer(args.fixtures, with_latency=True))
+    else:
+        upstream_http.set_transport(SyntheticUpstreams(metrics, args.http_ms))
+    emitter_module.DEBUG = False
+
+    run_tools = bedrock_caller_v2.run_tools
+    def timed_run_tools(*a, **kw):
+        with metrics.timed("stage.tools"):
+            return run_tools(*a, **kw)
+    bedrock_caller_v2.run_tools = timed_run_tools
+
+
+def _event(connection_id: str, text: str) -> Dict[str, Any]:
+    return {
+        "requestContext": {"connectionId": connection_id, "domainName": "load.test",
+                           "stage": "local"},
+        "body": json.dumps({"action": "sendMessage", "text": text}),
+    }
+
+
+def run_session(index: int, args, metrics: Metrics) -> None:
+    """One simulated client: sends `args.messages` messages, one after another."""
+    rng = random.Random(index)
+    connection_id = f"load-{index:04d}-{uuid.uuid4().hex[:6]}"
+    for _ in range(args.messages):
+        year, make, model = rng.choice(VEHICLES)
+        text = rng.choice(USER_MESSAGES).format(year=year, make=make, model=model)
+        try:
+            with metrics.timed("handler.total"):
+                lambda_function.lambda_handler(_event(connection_id, text), None)
+            metrics.count("messages")
+        except Exception as e: #pylint: disable=broad-exception-caught
+            metrics.count("handler_errors")
+            print(f"[session {index}] handler failed: {e}", file=sys.__stderr__)
+        _sleep_ms(args.think_ms)
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent connections")
+    parser.add_argument("--messages", type=int, default=3, help="messages per session")
+    parser.add_argument("--think-ms", type=float, default=200, help="pause between messages")
+    parser.add_argument("--model-ms", type=float, default=800, help="Converse latency")
+    parser.add_argument("--summarizer-ms", type=float, default=400, help="summarizer latency")
+    parser.add_argument("--db-ms", type=float, default=8, help="DynamoDB call latency")
+    parser.add_argument("--post-ms", type=float, default=15, help="post_to_connection latency")
+    parser.add_argument("--http-ms", type=float, default=150, help="upstream API latency")
+    parser.add_argument("--fixtures", help="replay recorded fixtures instead of synthetic APIs")
+    parser.add_argument("--verbose", action="store_true", help="keep the handler's stdout")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    _install(args, metrics)
+
+    sampler = Sampler()
+    sampler.start()
+    base_rss = _rss_mb()
+    started = time.perf_counter()
+    sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink, ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for future in [pool.submit(run_session, i, args, metrics) for i in range(args.sessions)]:
+            future.result()
+    wall = time.perf_counter() - started
+    sampler.stop_event.set()
+    sampler.join()
+
+    stages = {}
+    for stage, values in sorted(metrics.samples.items()):
+        stages[stage] = {
+            "n": len(values),
+            "p50_ms": round(statistics.median(values), 1),
+            "p95_ms": round(_percentile(values, 95), 1),
+            "p99_ms": round(_percentile(values, 99), 1),
+            "max_ms": round(max(values), 1),
+        }
+    report = {
+        "config": vars(args),
+        "wall_seconds": round(wall, 2),
+        "messages": metrics.counters["messages"],
+        "throughput_msgs_per_s": round(metrics.counters["messages"] / wall, 2) if wall else 0,
+        "handler_errors": metrics.counters["handler_errors"],
+        "tool_errors": metrics.counters["tool_errors"],
+        "frames": metrics.counters["frames"],
+        "frame_bytes": metrics.counters["frame_bytes"],
+        "threads_peak": max(sampler.threads, default=0),
+        "threads_mean": round(statistics.mean(sampler.threads), 1) if sampler.threads else 0,
+        "rss_start_mb": round(base_rss or 0, 1),
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": stages,
+    }
+
+    print(f"\n=== Load test: {args.sessions} sessions x {args.messages} messages ===")
+    print(f"wall {report['wall_seconds']}s   throughput {report['throughput_msgs_per_s']} msg/s   "
+          f"errors handler={report['handler_errors']} tool={report['tool_errors']}")
+    print(f"threads peak {report['threads_peak']} (mean {report['threads_mean']})   "
+          f"RSS start {report['rss_start_mb']} MB, peak {report['rss_peak_mb']} MB   "
+          f"frames {report['frames']} ({report['frame_bytes']} bytes)")
+    print(f"\n{'stage':<32} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for stage, row in stages.items():
+        print(f"{stage:<32} {row['n']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+              f"{row['p99_ms']:>9} {row['max_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Import-time profile of the on_send_message_v3 Lambda (module -> ms).
+
+Runs `python -X importtime` on the handler module in a fresh interpreter,
+the same work a cold start does before the first request, and reports the
+slowest modules by cumulative import time.
+
+    python profile_imports.py                  # top 25, grouped by top-level package
+    python profile_imports.py --all -n 60      # every module, not grouped
+    python profile_imports.py --json out.json  # also write the report for tracking
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(HERE, "..", "on_send_message_v3")
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str):
+    """Return [(depth, name, self_us, cumulative_us)] for a cold import of `module`."""
+    env = dict(os.environ)
+    env.setdefault("AWS_REGION", "us-east-1")
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    env.pop("AWS_LAMBDA_FUNCTION_NAME", None)  # skip init-phase warm-up network calls
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=LAMBDA_DIR, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cum_us, indent, name = match.groups()
+            rows.append((len(indent) // 2, name, int(self_us), int(cum_us)))
+    return rows
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="lambda_function")
+    parser.add_argument("-n", "--top", type=int, default=25)
+    parser.add_argument("--all", action="store_true", help="list modules individually")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total_ms = sum(self_us for _, _, self_us, _ in rows) / 1000
+
+    if args.all:
+        report = {name: cum / 1000 for _, name, _, cum in rows}
+    else:
+        # Group by top-level package; self times add up without double counting
+        grouped = defaultdict(int)
+        for _, name, self_us, _ in rows:
+            grouped[name.split(".")[0]] += self_us
+        report = {name: us / 1000 for name, us in grouped.items()}
+
+    ranked = sorted(report.items(), key=lambda kv: kv[1], reverse=True)
+    print(f"\n=== Import time for `{args.module}`: {total_ms:.1f} ms total ===")
+    for name, ms in ranked[:args.top]:
+        print(f"{name:<50} {ms:>9.2f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "total_ms": round(total_ms, 2),
+                       "modules_ms": {k: round(v, 2) for k, v in ranked}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Precompute make/year -> models for fetch_models_of_make_year.
+
+Every make and model year in nhtsa_prepared.csv is known ahead of time, so
+the Lambda can answer "which models did Toyota make in 2022" from a file
+instead of calling vPIC. Each model carries the body styles and vehicle
+types it was rated in. Makes are folded to their canonical names
+(vehicle_values.canonical_make), the same names the name resolver produces.
+
+Output (compact JSON):
+    {"years": [first, last],
+     "makes": {"TOYOTA": {"2022": [["CAMRY", ["4 DR"], ["PC"]], ...], ...}, ...}}
+
+    python build_models_index.py
+    python build_models_index.py --csv nhtsa_prepared.csv --output models.json
+"""
+import argparse
+import csv
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import vehicle_values
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DATA = os.path.join(HERE, "..", "aws-sam", "lambdas", "on_send_message_v3", "data")
+
+
+def build_index(path: str) -> dict:
+    """{"years": [lo, hi], "makes": {make: {year: [[model, body_styles, vehicle_types], ...]}}}"""
+    #(make, year) -> model -> (body styles, vehicle types)
+    found: Dict[Tuple[str, str], Dict[str, Tuple[Set[str], Set[str]]]] = defaultdict(dict)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            make = vehicle_values.canonical_make(row["MAKE"])
+            year = (row["MODEL_YR"] or "").strip()
+            model = " ".join((row["MODEL"] or "").split())
+            if not (make and year.isdigit() and model):
+                continue
+            styles, types = found[(make, year)].setdefault(model, (set(), set()))
+            if row["BODY_STYLE"].strip():
+                styles.add(" ".join(row["BODY_STYLE"].split()))
+            if row["VEHICLE_TYPE"].strip():
+                types.add(row["VEHICLE_TYPE"].strip())
+
+    makes: Dict[str, Dict[str, List[list]]] = defaultdict(dict)
+    for (make, year), models in sorted(found.items()):
+        makes[make][year] = [[model, sorted(styles), sorted(types)]
+                             for model, (styles, types) in sorted(models.items())]
+    years = sorted({int(year) for _, year in found})
+    return {"years": [years[0], years[-1]] if years else [], "makes": makes}
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(HERE, "nhtsa_prepared.csv"))
+    parser.add_argument("--output", default=os.path.join(LAMBDA_DATA, "models_by_make_year.json"))
+    args = parser.parse_args()
+
+    index = build_index(args.csv)
+    tmp = f"{args.output}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, args.output)
+    groups = sum(len(years) for years in index["makes"].values())
+    print(f"✅ Wrote {len(index['makes'])} makes, {groups} make/years to "
+          f"{os.path.normpath(args.output)} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Build the memory-mappable vehicle snapshot shipped with on_send_message_v3.
+
+Rows of nhtsa_prepared.csv are sorted by make and model year and written
+column by column: fixed-width little-endian integer arrays, string columns
+dictionary-encoded (codes + one UTF-8 blob per dictionary), canonical
+columns from vehicle_values.py (make aliases folded, seat min/max, drive
+train and body-class bitflags), plus a group index giving the [start, stop)
+rows of every make/year. The Lambda opens the file with mmap
+(vehicle_snapshot.py) and views the columns in place, so there is no CSV
+parsing, no value cleanup and no pandas at cold start.
+
+File layout (all offsets after the header are relative to the data start):
+    8 bytes   magic b"NHTSNAP1"
+    4 bytes   header length (uint32 LE)
+    n bytes   JSON header: rows, columns, dictionaries, groups, flags, make_aliases
+    padding   to 8 bytes; every array below is 8-byte aligned too
+
+    python build_vehicle_snapshot.py
+    python build_vehicle_snapshot.py --csv nhtsa_prepared.csv --output vehicles.snap
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import struct
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import vehicle_values
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DATA = os.path.join(HERE, "..", "aws-sam", "lambdas", "on_send_message_v3", "data")
+
+MAGIC = b"NHTSNAP1"
+VERSION = 2
+ALIGN = 8
+
+#string columns: stored as dictionary codes
+STRING_COLUMNS = ['MAKE', 'MODEL', 'BODY_STYLE', 'VEHICLE_TYPE', 'DRIVE_TRAIN', 'NUM_OF_SEATING']
+#numeric columns: blank -> 0
+INT_COLUMNS = {'MODEL_YR': '<i2', 'OVERALL_STARS': '<i1'}
+#canonical columns derived per row: name -> (dtype, function of the row)
+DERIVED_COLUMNS = {
+    'SEATS_MIN': ('<u1', lambda r: vehicle_values.seat_range(r['NUM_OF_SEATING'])[0]),
+    'SEATS_MAX': ('<u1', lambda r: vehicle_values.seat_range(r['NUM_OF_SEATING'])[1]),
+    'DRIVE_FLAGS': ('<u1', lambda r: vehicle_values.drive_flags(r['DRIVE_TRAIN'])),
+    'BODY_FLAGS': ('<u1', lambda r: vehicle_values.body_flags(r['VEHICLE_TYPE'])),
+}
+
+
+def _to_int(value: str) -> int:
+    value = value.strip()
+    return int(value) if value.isdigit() else 0
+
+
+def _code_dtype(size: int) -> str:
+    return '<u1' if size <= 0xFF else '<u2' if size <= 0xFFFF else '<u4'
+
+
+def read_rows(path: str) -> List[Dict[str, str]]:
+    """Rows of nhtsa_prepared.csv, stripped, makes canonical, sorted by make / year / model."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = [{c: (r.get(c) or "").strip() for c in STRING_COLUMNS + list(INT_COLUMNS)}
+                for r in csv.DictReader(f)]
+    for row in rows:
+        row['MAKE'] = vehicle_values.canonical_make(row['MAKE'])
+    rows.sort(key=lambda r: (r['MAKE'], _to_int(r['MODEL_YR']), r['MODEL'], r['BODY_STYLE']))
+    return rows
+
+
+def encode(rows: List[Dict[str, str]]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """Column arrays and the sorted dictionary of every string column."""
+    arrays: Dict[str, np.ndarray] = {}
+    dictionaries: Dict[str, List[str]] = {}
+    for col in STRING_COLUMNS:
+        values = sorted({r[col] for r in rows})
+        index = {v: i for i, v in enumerate(values)}
+        arrays[col] = np.array([index[r[col]] for r in rows], dtype=_code_dtype(len(values)))
+        dictionaries[col] = values
+    for col, dtype in INT_COLUMNS.items():
+        arrays[col] = np.array([_to_int(r[col]) for r in rows], dtype=dtype)
+    for col, (dtype, derive) in DERIVED_COLUMNS.items():
+        arrays[col] = np.array([derive(r) for r in rows], dtype=dtype)
+    return arrays, dictionaries
+
+
+def make_year_groups(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """[start, stop) rows of each make/year run (rows are already sorted by both)."""
+    make, year = arrays['MAKE'].astype(np.int64), arrays['MODEL_YR'].astype(np.int64)
+    if not len(make):
+        empty = np.zeros(0, dtype='<u4')
+        return {'make': empty, 'year': empty, 'start': empty, 'stop': empty}
+    change = np.flatnonzero((np.diff(make) != 0) | (np.diff(year) != 0)) + 1
+    starts = np.concatenate(([0], change)).astype('<u4')
+    stops = np.concatenate((change, [len(make)])).astype('<u4')
+    return {
+        'make': arrays['MAKE'][starts].astype('<u2'),
+        'year': arrays['MODEL_YR'][starts].astype('<i2'),
+        'start': starts,
+        'stop': stops,
+    }
+
+
+class _Writer:
+    """Collects 8-byte-aligned blocks and records where each one lands."""
+
+    def __init__(self):
+        self.blocks: List[bytes] = []
+        self.size = 0
+
+    def add(self, data: bytes) -> dict:
+        """Append a block; returns its {offset, length}."""
+        ref = {"offset": self.size, "length": len(data)}
+        pad = -len(data) % ALIGN
+        self.blocks.append(data + b"\0" * pad)
+        self.size += len(data) + pad
+        return ref
+
+    def array(self, arr: np.ndarray) -> dict:
+        """Append an array; returns its {offset, length, dtype, count}."""
+        ref = self.add(np.ascontiguousarray(arr).tobytes())
+        ref.update(dtype=arr.dtype.str, count=int(arr.size))
+        return ref
+
+
+def build(csv_path: str, out_path: str) -> dict:
+    """Write the snapshot; returns its header."""
+    rows = read_rows(csv_path)
+    arrays, dictionaries = encode(rows)
+    writer = _Writer()
+
+    header = {"version": VERSION, "rows": len(rows), "columns": {}, "dictionaries": {},
+              "groups": {}, "built_at": int(time.time()),
+              "flags": {"DRIVE_FLAGS": vehicle_values.DRIVE_FLAGS,
+                        "BODY_FLAGS": vehicle_values.BODY_FLAGS},
+              "make_aliases": vehicle_values.make_aliases()}
+    with open(csv_path, "rb") as f:
+        header["source_sha1"] = hashlib.sha1(f.read()).hexdigest()
+
+    for col, arr in arrays.items():
+        header["columns"][col] = writer.array(arr)
+    for col, values in dictionaries.items():
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype('<u4')
+        header["dictionaries"][col] = {
+            "offsets": writer.array(offsets),
+            "blob": writer.add(b"".join(encoded)),
+        }
+    for name, arr in make_year_groups(arrays).items():
+        header["groups"][name] = writer.array(arr)
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(prefix)
+        for block in writer.blocks:
+            f.write(block)
+    os.replace(tmp, out_path)
+    return header
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(HERE, "nhtsa_prepared.csv"))
+    parser.add_argument("--output", default=os.path.join(LAMBDA_DATA, "nhtsa_vehicles.snap"))
+    args = parser.parse_args()
+
+    header = build(args.csv, args.output)
+    print(f"✅ Wrote {header['rows']} rows, {header['groups']['start']['count']} "
+          f"make/year groups to {os.path.normpath(args.output)} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,24 @@ $region = "us-east-1"
 $file   = "nhtsa_prepared.csv"
 $table  = "nhtsa_data"
 
-# === Upload the CSV to S3 ===
-Write-Host "Uploading $file to s3://vehicle-data-for-chatbot/nhtsa_auto/$file ..."
-aws s3 cp $file "s3://vehicle-data-for-chatbot/nhtsa_auto/$file" --region $region
+# === Create the table with its keys and secondary indexes ===
+# table-schema.json (PK = MAKE#MODEL, SK from load_nhtsa_table.py) is the one
+# schema the loader, the update script and the Lambda's queries agree on.
+Write-Host "Creating $table from table-schema.json ..."
+aws dynamodb create-table --cli-input-json file://table-schema.json --region $region
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "❌ Could not create $table."
+    exit $LASTEXITCODE
+}
+aws dynamodb wait table-exists --table-name $table --region $region
 
-# === Load the working table schema ===
-Write-Host "Loading schema from nhtsa_schema.json ..."
-$json = Get-Content "nhtsa_schema.json" -Raw
+# === Load every row through the incremental loader ===
+# Same keys as later updates; a scan of the new, empty table makes every row an insert.
+Write-Host "Loading $file into $table ..."
+python load_nhtsa_table.py --csv $file --table $table --region $region --rebuild-snapshot
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "❌ Initial load failed for $table."
+    exit $LASTEXITCODE
+}
 
-# === Import into DynamoDB ===
-Write-Host "Importing $file into DynamoDB table $table ..."
-aws dynamodb import-table `
-  --input-format CSV `
-  --s3-bucket-source S3Bucket="vehicle-data-for-chatbot",S3KeyPrefix="nhtsa_auto" `
-  --table-creation-parameters "$json" `
-  --region $region
-
-Write-Host "Import completed for $table."
+Write-Host "✅ Initialization completed for $table."
@@ -6,30 +6,26 @@ $region = "us-east-1"
 $file   = "nhtsa_prepared.csv"
 $table  = "nhtsa_data"
 
-# === Upload the CSV to S3 ===
-Write-Host "Uploading $file to s3://vehicle-data-for-chatbot/nhtsa_auto/$file ..."
-aws s3 cp $file "s3://vehicle-data-for-chatbot/nhtsa_auto/$file" --region $region
-
-# === Load the working table schema ===
-Write-Host "Loading schema from nhtsa_schema.json ..."
-$json = Get-Content "nhtsa_schema.json" -Raw
-
-# === Delete existing table if it exists ===
-Write-Host "Checking for existing table $table ..."
-aws dynamodb describe-table --table-name $table --region $region >$null 2>&1
-if ($LASTEXITCODE -eq 0) {
-    Write-Host "Deleting existing table $table ..."
-    aws dynamodb delete-table --table-name $table --region $region
-    Write-Host "Waiting for deletion to complete ..."
-    aws dynamodb wait table-not-exists --table-name $table --region $region
+# === Apply only what changed ===
+# Diffs the CSV against a scan of the live table and writes inserts, updates
+# and deletes in parallel batches. The table stays online; no delete/re-import.
+Write-Host "Diffing $file against $table ..."
+python load_nhtsa_table.py --csv $file --table $table --region $region --rebuild-snapshot
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "❌ Incremental load failed for $table."
+    exit $LASTEXITCODE
 }
 
-# === Import into DynamoDB ===
-Write-Host "Importing $file into DynamoDB table $table ..."
-aws dynamodb import-table `
-  --input-format CSV `
-  --s3-bucket-source S3Bucket="vehicle-data-for-chatbot",S3KeyPrefix="nhtsa_auto" `
-  --table-creation-parameters "$json" `
-  --region $region
+# === Refresh the data files shipped with on_send_message_v3 ===
+python build_vehicle_snapshot.py --csv $file
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "❌ Vehicle snapshot build failed."
+    exit $LASTEXITCODE
+}
+python build_models_index.py --csv $file
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "❌ Models index build failed."
+    exit $LASTEXITCODE
+}
 
-Write-Host "✅ Import completed for $table."
+Write-Host "✅ Update completed for $table."
@@ -0,0 +1,231 @@
+"""
+Incremental loader for the nhtsa_data DynamoDB table.
+
+Instead of deleting the table and re-importing the whole CSV, this computes a
+collision-free key and a content hash for every row of nhtsa_prepared.csv,
+diffs them against the snapshot written by the previous run, and applies only
+the changes: PutRequest for inserted/changed rows, DeleteRequest for rows that
+disappeared. Writes go out as parallel BatchWriteItem segments, retrying
+UnprocessedItems with backoff. The table stays online throughout.
+
+Keys:
+    PK = MAKE#MODEL
+    SK = MODEL_YR#BODY_STYLE#DRIVE_TRAIN#VEHICLE_TYPE#NUM_OF_SEATING[#n]
+Makes are folded to their full name (vehicle_values.canonical_make) and the
+key attributes are stored as nhtsa_keys.key_text(), the normalizer the
+Lambda's nhtsa_table.py queries with, so "Civic  Hatchback" and "ALFA" are
+found as "CIVIC HATCHBACK" and "ALFA ROMEO".
+The old SK (MODEL_YR#BODY_STYLE) collided for e.g. ACURA MDX 2026 SUV AWD vs
+FWD. Exact duplicate rows are loaded once; rows that still share a key (same
+vehicle, different OVERALL_STARS) get a #2, #3... suffix, ordered by content
+so the numbering is stable between runs.
+
+    python load_nhtsa_table.py --dry-run            # show the diff only
+    python load_nhtsa_table.py                      # apply it
+    python load_nhtsa_table.py --rebuild-snapshot   # diff against a scan of the live table
+
+This is the only place keys are made: prepare_csv.py writes no PK/SK, and
+create_canonical_table_initialize.ps1 creates the table from table-schema.json
+and fills it with this loader.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+import vehicle_values
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+#key normalizer shared with the Lambda that reads the table
+sys.path.insert(0, os.path.join(HERE, "..", "aws-sam", "lambdas", "on_send_message_v3"))
+from nhtsa_keys import KEY_ATTRIBUTES, key_text, partition_key #pylint: disable=wrong-import-position
+
+ATTRIBUTES = ['MAKE', 'MODEL', 'MODEL_YR', 'BODY_STYLE', 'VEHICLE_TYPE', 'DRIVE_TRAIN', 'NUM_OF_SEATING', 'OVERALL_STARS']
+SK_FIELDS = ['MODEL_YR', 'BODY_STYLE', 'DRIVE_TRAIN', 'VEHICLE_TYPE', 'NUM_OF_SEATING']
+BATCH_SIZE = 25          # BatchWriteItem limit
+MAX_ATTEMPTS = 8         # per batch, for UnprocessedItems and throttling
+RETRYABLE_CODES = {"ProvisionedThroughputExceededException", "ThrottlingException",
+                   "RequestLimitExceeded", "InternalServerError"}
+
+Key = Tuple[str, str]
+Row = Dict[str, str]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# KEYS & HASHES
+# ────────────────────────────────────────────────────────────────────────────────
+def row_hash(row: Row) -> str:
+    """Content hash over the stored attributes."""
+    payload = json.dumps([row.get(a, "") for a in ATTRIBUTES], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def keyed_rows(rows: List[Row]) -> Dict[Key, Row]:
+    """Assign every distinct row a unique (PK, SK)."""
+    groups: Dict[Key, Dict[str, Row]] = defaultdict(dict)
+    for row in rows:
+        pk = partition_key(row['MAKE'], row['MODEL'])
+        sk = "#".join(row[f] for f in SK_FIELDS)
+        groups[(pk, sk)][row_hash(row)] = row  # identical rows collapse here
+
+    keyed: Dict[Key, Row] = {}
+    for (pk, sk), variants in groups.items():
+        for n, (_, row) in enumerate(sorted(variants.items()), start=1):
+            keyed[(pk, sk if n == 1 else f"{sk}#{n}")] = row
+    return keyed
+
+
+def normalize(row: Row) -> Row:
+    """Canonical make and key_text() key attributes, as the Lambda queries them."""
+    row = dict(row)
+    row['MAKE'] = vehicle_values.canonical_make(row['MAKE'])
+    for a in KEY_ATTRIBUTES:
+        row[a] = key_text(row[a])
+    return row
+
+
+def read_rows(path: str) -> List[Row]:
+    """Normalized rows of nhtsa_prepared.csv (PK/SK columns of older files are ignored)."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [normalize({a: (r.get(a) or "").strip() for a in ATTRIBUTES})
+                for r in csv.DictReader(f)]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# SNAPSHOTS
+# ────────────────────────────────────────────────────────────────────────────────
+def _snapshot_key(key: Key) -> str:
+    return f"{key[0]}\t{key[1]}"
+
+
+def load_snapshot(path: str) -> Dict[Key, str]:
+    """{(PK, SK): row hash} from the previous run, or {} if there was none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {tuple(k.split("\t", 1)): h for k, h in raw["rows"].items()}
+
+
+def save_snapshot(path: str, table: str, hashes: Dict[Key, str]) -> None:
+    """Write the snapshot atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"table": table, "written_at": int(time.time()),
+                   "rows": {_snapshot_key(k): h for k, h in sorted(hashes.items())}}, f)
+    os.replace(tmp, path)
+
+
+def scan_snapshot(client, table: str, segments: int) -> Dict[Key, str]:
+    """Rebuild the snapshot from the live table with a parallel Scan."""
+    def _scan(segment: int) -> Dict[Key, str]:
+        found: Dict[Key, str] = {}
+        kwargs = {"TableName": table, "Segment": segment, "TotalSegments": segments}
+        while True:
+            page = client.scan(**kwargs)
+            for item in page.get("Items", []):
+                row = {a: item.get(a, {}).get("S", "") for a in ATTRIBUTES}
+                found[(item["PK"]["S"], item["SK"]["S"])] = row_hash(row)
+            if "LastEvaluatedKey" not in page:
+                return found
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+    merged: Dict[Key, str] = {}
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        for part in pool.map(_scan, range(segments)):
+            merged.update(part)
+    return merged
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# DIFF & WRITE
+# ────────────────────────────────────────────────────────────────────────────────
+def diff(previous: Dict[Key, str], current: Dict[Key, Row]):
+    """Return (inserts, updates, deletes) as key lists."""
+    inserts = [k for k in current if k not in previous]
+    updates = [k for k, row in current.items() if k in previous and previous[k] != row_hash(row)]
+    deletes = [k for k in previous if k not in current]
+    return inserts, updates, deletes
+
+
+def _put(key: Key, row: Row) -> dict:
+    # Empty strings are left out: GSI key attributes (MODEL_YR, VEHICLE_TYPE, MAKE)
+    # cannot be empty, and an absent attribute just keeps the row out of that index.
+    item = {"PK": {"S": key[0]}, "SK": {"S": key[1]}}
+    item.update({a: {"S": v} for a, v in row.items() if v})
+    return {"PutRequest": {"Item": item}}
+
+
+def _delete(key: Key) -> dict:
+    return {"DeleteRequest": {"Key": {"PK": {"S": key[0]}, "SK": {"S": key[1]}}}}
+
+
+def _write_batch(client, table: str, requests: List[dict]) -> None:
+    pending = requests
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            resp = client.batch_write_item(RequestItems={table: pending})
+            pending = resp.get("UnprocessedItems", {}).get(table, [])
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in RETRYABLE_CODES:
+                raise
+        if not pending:
+            return
+        time.sleep(min(5.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.5))
+    raise RuntimeError(f"{len(pending)} writes still unprocessed after {MAX_ATTEMPTS} attempts")
+
+
+def apply_changes(client, table: str, requests: List[dict], workers: int) -> None:
+    """Send requests as BatchWriteItem batches of 25, `workers` batches at a time."""
+    batches = [requests[i:i + BATCH_SIZE] for i in range(0, len(requests), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(lambda b: _write_batch(client, table, b), batches):
+            pass
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(HERE, "nhtsa_prepared.csv"))
+    parser.add_argument("--table", default="nhtsa_data")
+    parser.add_argument("--region", default=os.getenv("AWS_REGION", "us-east-1"))
+    parser.add_argument("--snapshot", default=os.path.join(HERE, "nhtsa_snapshot.json"))
+    parser.add_argument("--rebuild-snapshot", action="store_true",
+                        help="scan the live table instead of trusting the snapshot file")
+    parser.add_argument("--workers", type=int, default=8, help="parallel BatchWriteItem calls")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    current = keyed_rows(read_rows(args.csv))
+    client = boto3.client("dynamodb", region_name=args.region)
+    if args.rebuild_snapshot:
+        previous = scan_snapshot(client, args.table, args.workers)
+    else:
+        previous = load_snapshot(args.snapshot)
+
+    inserts, updates, deletes = diff(previous, current)
+    print(f"{len(current)} rows: {len(inserts)} inserts, {len(updates)} updates, "
+          f"{len(deletes)} deletes (previous snapshot: {len(previous)} rows)")
+    if args.dry_run:
+        return
+
+    started = time.monotonic()
+    requests = [_put(k, current[k]) for k in inserts + updates] + [_delete(k) for k in deletes]
+    apply_changes(client, args.table, requests, args.workers)
+    save_snapshot(args.snapshot, args.table, {k: row_hash(r) for k, r in current.items()})
+    print(f"✅ Applied {len(requests)} writes to {args.table} in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
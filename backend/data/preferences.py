@@ -1,6 +1,7 @@
 #file contins enums for preference flags & method to make enum
 #also includes a filterCars() method to demonstrate how flags may be used
 
+import json
 from enum import Enum
 import pandas as pd
 
@@ -112,7 +113,7 @@ class overall_stars(Enum):
     one = ["1"] #manually added since there is no car with a 1 rating
     nan = ["nan"]
 
-#temp, currently the only enum that isn't working
+#hand-kept groups; vehicle_filter matches on the min/max seats parsed by vehicle_values
 #since num of seating is very badly formatted
 class num_of_seating(Enum):
     one = ["1", "1 to 2", "1 to 5"]
@@ -133,6 +134,12 @@ def make_enum(database, column):
         print("column " + column + " does not exist")
         return
     print("class " + column.lower() + "(Enum):")
+    #columns with a canonical mapping (see vehicle_values.py) are grouped in one pass
+    from vehicle_values import LABELERS, build_enum #imported here: vehicle_values imports make above
+    if column in LABELERS:
+        for member in build_enum(column, database[column].fillna("").astype(str)):
+            print(member.name + " = " + json.dumps(member.value))
+        return
     #get data
     unique_values = pd.DataFrame(columns=[column],data=database[column].drop_duplicates())
     
@@ -220,25 +227,19 @@ def makeValidIndentifier(id):
 #        print(formatIdentifier(val) + ' = "' + val + '"')
 
 #flags are defined as enums
-#sort flags by type?
+#flags of the same type are OR-ed, different types AND-ed (see vehicle_filter.py)
 def filterCars(database, flags_list = []):
-    for x in flags_list:
-        if isinstance(x, drive_train):
-            database = database.loc[database['DRIVE_TRAIN'] == x._value_]
-        elif isinstance(x, vehicle_type):
-            database = database.loc[database['VEHICLE_TYPE'] == x._value_]
-        elif isinstance(x, num_of_seating):
-            database = database[database['NUM_OF_SEATING'].isin(x._value_)]
-        elif isinstance(x, overall_stars):
-            database = database.loc[database['OVERALL_STARS'] == x._value_]
-    return database
+    from vehicle_filter import engine_for #imported here: vehicle_filter imports the enums above
+    return engine_for(database).filter(flags_list)
 
 #execute the following lines:
 
-df = pd.read_csv("backend\\data\\nhtsa_prepared.csv", dtype = str)
-#test_flags = [overall_stars.five, num_of_seating.four]
-#print(filterCars(df,test_flags))
-make_enum(df, "DRIVE_TRAIN")
+if __name__ == "__main__":
+    import os
+    df = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "nhtsa_prepared.csv"), dtype = str)
+    #test_flags = [overall_stars.five, num_of_seating.four]
+    #print(filterCars(df,test_flags))
+    make_enum(df, "DRIVE_TRAIN")
 
 #'MAKE'
 #'MODEL'            no go, too many variables
@@ -1,25 +1,139 @@
 # make_pk_sk.py
+"""
+Prepare the raw NHTSA Safercar dump for the nhtsa_data table.
+
+Reads the raw CSV in chunks, normalizes each chunk in a worker process and
+streams the results, in input order, to nhtsa_prepared.csv and (when pyarrow
+is installed) a compact Parquet file. Peak memory is a few chunks rather
+than the whole dump.
+
+    python prepare_csv.py                                   # defaults next to this script
+    python prepare_csv.py --input Safercar_data.csv --workers 8 --chunksize 20000
+    python prepare_csv.py --no-parquet
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 #what columns to save
 nhtsaSafetyFields = ['MAKE', 'MODEL', 'MODEL_YR', 'BODY_STYLE', 'VEHICLE_TYPE', 'DRIVE_TRAIN', 'NUM_OF_SEATING', 'OVERALL_STARS']
-minimumYear = 2000; #drop any car made before 2000.
+#no PK/SK here: keys need the whole file to number duplicates, so load_nhtsa_table.py assigns them
+outputFields = nhtsaSafetyFields
+# Few distinct values: shipped between processes as categoricals (codes + one copy of each label)
+categoricalFields = ['MAKE', 'MODEL_YR', 'BODY_STYLE', 'VEHICLE_TYPE', 'DRIVE_TRAIN', 'NUM_OF_SEATING', 'OVERALL_STARS']
+
+
+def prepare_chunk(chunk: pd.DataFrame, min_year: int = 0) -> pd.DataFrame:
+    """Default and strip one chunk of raw rows."""
+    #set default value
+    for col in nhtsaSafetyFields:
+        if col not in chunk:
+            chunk[col] = ""
+        chunk[col] = chunk[col].fillna("").astype(str).str.strip()
+
+    #remove unneeded columns
+    chunk = chunk[nhtsaSafetyFields]
+    if min_year:
+        years = pd.to_numeric(chunk['MODEL_YR'], errors='coerce')
+        chunk = chunk[years >= min_year]
+    return chunk.astype({col: "category" for col in categoricalFields})
+
+
+def _read_chunks(path: str, chunksize: int):
+    return pd.read_csv(
+        path,
+        dtype=str,
+        keep_default_na=False,          # empty cells stay "", not NaN
+        usecols=lambda c: c in nhtsaSafetyFields,
+        chunksize=chunksize,
+    )
+
+
+class _ParquetSink:
+    """Appends chunks to one Parquet file; disabled if pyarrow isn't installed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        if path:
+            try:
+                import pyarrow as pa #pylint: disable=import-outside-toplevel
+                import pyarrow.parquet as pq #pylint: disable=import-outside-toplevel
+                self._pa, self._pq = pa, pq
+            except ImportError:
+                print("pyarrow not installed; skipping Parquet output")
+                self.path = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """Append one chunk (string columns, dictionary-encoded by Parquet)."""
+        if not self.path:
+            return
+        table = self._pa.Table.from_pandas(chunk.astype(str), preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self.writer is not None:
+            self.writer.close()
+
+
+def run(input_path: str, csv_path: str, parquet_path, chunksize: int, workers: int,
+        min_year: int = 0) -> int:
+    """Run the pipeline; returns the number of rows written."""
+    parquet = _ParquetSink(parquet_path)
+    rows = 0
+    first = True
+    # Bounded look-ahead: at most 2 chunks per worker are read but not yet written
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(csv_path, "w", encoding="utf-8", newline="") as out:
+
+        def _drain_one():
+            nonlocal rows, first
+            prepared = pending.popleft().result()
+            prepared[outputFields].to_csv(out, index=False, header=first)
+            parquet.write(prepared[outputFields])
+            rows += len(prepared)
+            first = False
+
+        for chunk in _read_chunks(input_path, chunksize):
+            pending.append(pool.submit(prepare_chunk, chunk, min_year))
+            if len(pending) >= 2 * workers:
+                _drain_one()
+        while pending:
+            _drain_one()
+
+        if first:  # empty input: still write the header
+            pd.DataFrame(columns=outputFields).to_csv(out, index=False)
+    parquet.close()
+    return rows
 
-#the file to read
-nhtsaSafetyDf = pd.read_csv("backend\\data\\Safercar_data.csv", dtype = str)
 
-#set default value
-for col, default in [("MAKE",""), ("MODEL",""), ("MODEL_YR",""), ("BODY_STYLE",""), ("VEHICLE_TYPE", ""), ("DRIVE_TRAIN", ""), ("NUM_OF_SEATING", ""), ("OVERALL_STARS", "")]:
-    if col not in nhtsaSafetyDf:
-        nhtsaSafetyDf[col] = default
-    nhtsaSafetyDf[col] = nhtsaSafetyDf[col].fillna(default).astype(str).str.strip()
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=os.path.join(HERE, "Safercar_data.csv"))
+    parser.add_argument("--output", default=os.path.join(HERE, "nhtsa_prepared.csv"))
+    parser.add_argument("--parquet", default=os.path.join(HERE, "nhtsa_prepared.parquet"))
+    parser.add_argument("--no-parquet", action="store_true")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-year", type=int, default=0,
+                        help="drop rows with an older MODEL_YR (0 keeps everything)")
+    args = parser.parse_args()
 
-#remove unneeded columns
-nhtsaSafetyDf = nhtsaSafetyDf[nhtsaSafetyFields]
+    rows = run(args.input, args.output, None if args.no_parquet else args.parquet,
+               args.chunksize, args.workers, args.min_year)
+    print(f"✅ Wrote {rows} rows to {os.path.basename(args.output)}")
 
-#key, can use multiindexing but this is probably easier
-nhtsaSafetyDf['PK'] = nhtsaSafetyDf['MAKE'] + "#" + nhtsaSafetyDf['MODEL']
-nhtsaSafetyDf['SK'] = nhtsaSafetyDf['MODEL_YR'] + "#" + nhtsaSafetyDf['BODY_STYLE']
 
-nhtsaSafetyDf.to_csv("backend\\data\\nhtsa_prepared.csv", index=False)
-print("✅ Wrote nhtsa_prepared.csv")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#canonical forms of the messy NHTSA columns
+#every raw value maps to integer codes / labels once, so downstream filters compare
+#numbers instead of matching strings. the same mappings build the preference enums
+#and the reverse indexes (canonical label -> raw values).
+
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Type
+
+from preferences import make
+
+#drive train capability bitflags; "AWD/FWD" is offered as both, so it carries both bits
+DRIVE_FLAGS = {"FWD": 1, "RWD": 2, "AWD": 4, "4WD": 8, "2WD": 16}
+DRIVE_ALIASES = {"FWD": "FWD", "RWD": "RWD", "AWD": "AWD", "ADW": "AWD",
+                 "4WD": "4WD", "4X4": "4WD", "2WD": "2WD", "4X2": "2WD"}
+
+#body classes a shopper asks for; NHTSA files most SUVs and minivans as MPV, so MPV is both
+BODY_FLAGS = {"car": 1, "suv": 2, "truck": 4, "van": 8}
+BODY_CLASSES = {
+    "PC": "car", "4 DR": "car", "5 HB": "car", "BEV": "car", "PHEV": "car",
+    "MINI PASSENGER CAR": "car", "LIGHT PASSENGER CAR": "car",
+    "COMPACT PASSENGER CAR": "car", "MEDIUM PASSENGER CAR": "car",
+    "HEAVY PASSENGER CAR": "car",
+    "SUV": "suv", "SPORT UTILITY VEHICLE": "suv", "MPV": "suv van",
+    "TRUCK": "truck", "PICKUP": "truck", "PU/CC": "truck",
+    "VAN": "van", "BUS": "van", "MPV/BUS": "van",
+}
+
+#what people (and the LLM) call a make, beyond the aliases in preferences.make
+MAKE_NICKNAMES = {
+    "CHEVY": "CHEVROLET", "VW": "VOLKSWAGEN", "MERCEDES": "MERCEDES-BENZ", "BENZ": "MERCEDES-BENZ",
+    "MB": "MERCEDES-BENZ", "LANDROVER": "LAND ROVER", "ROLLS ROYCE": "ROLLS-ROYCE",
+    "ALFAROMEO": "ALFA ROMEO", "CADDY": "CADILLAC", "MITSU": "MITSUBISHI",
+}
+
+MAX_SEATS = 15
+UNKNOWN = "nan"  #label of blank / unparseable values, as in preferences.py
+
+_NUMBER = re.compile(r"\d+")
+_PLUS = re.compile(r"(\d+)\s*\+\s*(\d+)")
+
+
+def _clean(raw) -> str:
+    return " ".join(str(raw if raw is not None else "").replace('"', " ").split()).upper()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# PER-COLUMN NORMALIZERS (all cached: a column has few distinct values)
+# ────────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=None)
+def seat_range(raw: str) -> Tuple[int, int]:
+    """
+    (fewest, most) seats offered; (0, 0) if unknown.
+    "5 or 6" -> (5, 6), "7 TO 9" -> (7, 9), "2+2" -> (4, 4), "57," -> (5, 7),
+    "LX: 7 All Others: 8" -> (7, 8)
+    """
+    text = _PLUS.sub(lambda m: str(int(m.group(1)) + int(m.group(2))), _clean(raw))
+    seats: List[int] = []
+    for token in _NUMBER.findall(text):
+        value = int(token)
+        if 0 < value <= MAX_SEATS:
+            seats.append(value)
+        elif all(d != "0" for d in token):  #"57" is a lost separator: 5 and 7
+            seats.extend(int(d) for d in token)
+    return (min(seats), max(seats)) if seats else (0, 0)
+
+
+@lru_cache(maxsize=None)
+def drive_flags(raw: str) -> int:
+    """OR of DRIVE_FLAGS for every drive train named ("fWD", "4x4", "RWD/AWD" ...)."""
+    bits = 0
+    for part in _clean(raw).split("/"):
+        canonical = DRIVE_ALIASES.get(part.strip())
+        if canonical:
+            bits |= DRIVE_FLAGS[canonical]
+    return bits
+
+
+@lru_cache(maxsize=None)
+def body_flags(raw: str) -> int:
+    """OR of BODY_FLAGS for a VEHICLE_TYPE value."""
+    bits = 0
+    for body in BODY_CLASSES.get(_clean(raw), "").split():
+        bits |= BODY_FLAGS[body]
+    return bits
+
+
+@lru_cache(maxsize=None)
+def canonical_make(raw: str) -> str:
+    """Full manufacturer name for any alias or nickname ("ALFA" -> "ALFA ROMEO", "CHEVY" -> "CHEVROLET")."""
+    text = _clean(raw)
+    return _make_names().get(text, text)
+
+
+@lru_cache(maxsize=1)
+def _make_names() -> Dict[str, str]:
+    #the longest alias of a member is its full name
+    names = {alias: max(member.value, key=len) for member in make for alias in member.value}
+    names.update(MAKE_NICKNAMES)
+    return names
+
+
+def make_aliases() -> Dict[str, str]:
+    """Every known alias / nickname -> full make name (shipped in the vehicle snapshot)."""
+    return {alias: name for alias, name in _make_names().items() if alias != name}
+
+
+def stars(raw: str) -> int:
+    """Overall star rating, 0 if unrated."""
+    text = _clean(raw)
+    return int(text) if text.isdigit() else 0
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# LABELS, REVERSE INDEXES AND ENUMS
+# ────────────────────────────────────────────────────────────────────────────────
+def _drive_labels(raw: str) -> List[str]:
+    bits = drive_flags(raw)
+    return [name for name, bit in DRIVE_FLAGS.items() if bits & bit]
+
+
+def _seat_labels(raw: str) -> List[str]:
+    low, high = seat_range(raw)
+    return [str(n) for n in range(low, high + 1)] if low else []
+
+
+def _type_labels(raw: str) -> List[str]:
+    return [part.strip() for part in _clean(raw).split("/") if part.strip()]
+
+
+def _star_labels(raw: str) -> List[str]:
+    return [str(stars(raw))] if stars(raw) else []
+
+
+#column -> canonical labels of a raw value (a value may carry several, e.g. "AWD/FWD")
+LABELERS = {
+    "MAKE": lambda raw: [canonical_make(raw)] if _clean(raw) else [],
+    "DRIVE_TRAIN": _drive_labels,
+    "NUM_OF_SEATING": _seat_labels,
+    "VEHICLE_TYPE": _type_labels,
+    "OVERALL_STARS": _star_labels,
+}
+
+
+def reverse_index(column: str, raw_values: Iterable[str]) -> Dict[str, List[str]]:
+    """Canonical label -> distinct raw values carrying it (blank / unparseable under "nan")."""
+    labeler = LABELERS[column]
+    index: Dict[str, List[str]] = {}
+    for raw in dict.fromkeys(raw_values):
+        labels = labeler(raw) or [UNKNOWN]
+        for label in labels:
+            index.setdefault(label, []).append(raw)
+    return index
+
+
+def seat_mask(raw: str) -> int:
+    """Bit n set = n seats offered."""
+    low, high = seat_range(raw)
+    return sum(1 << n for n in range(low, high + 1)) if low else 0
+
+
+#column -> integer code of a raw value (0 = unknown, except MAKE which is a dictionary index)
+CODERS = {
+    "DRIVE_TRAIN": drive_flags,
+    "NUM_OF_SEATING": seat_mask,
+    "VEHICLE_TYPE": body_flags,
+    "OVERALL_STARS": stars,
+}
+
+
+def codes(column: str, raw_values: Iterable[str]) -> Dict[str, int]:
+    """Raw value -> integer code; MAKE codes index the sorted canonical make names."""
+    distinct = list(dict.fromkeys(raw_values))
+    if column == "MAKE":
+        names = sorted({canonical_make(raw) for raw in distinct})
+        position = {name: i for i, name in enumerate(names)}
+        return {raw: position[canonical_make(raw)] for raw in distinct}
+    return {raw: CODERS[column](raw) for raw in distinct}
+
+
+def build_enum(column: str, raw_values: Iterable[str]) -> Type[Enum]:
+    """Enum in the preferences.py format: member = [raw values carrying that label]."""
+    index = reverse_index(column, raw_values)
+    members = {identifier(label): raws for label, raws in sorted(index.items(),
+                                                                  key=lambda kv: (len(kv[0]), kv[0]))}
+    return Enum(column.lower(), members)
+
+
+_NUMBER_WORDS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+                 "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen"]
+
+
+def identifier(label: str) -> str:
+    """Valid Python identifier for a label ("4WD" -> "fourWD", "12" -> "twelve", "LAND ROVER" -> "LAND_ROVER")."""
+    if label.isdigit() and int(label) < len(_NUMBER_WORDS):
+        return _NUMBER_WORDS[int(label)]
+    name = re.sub(r"[^0-9A-Za-z_]", "_", label) or UNKNOWN
+    return _NUMBER_WORDS[int(name[0])] + name[1:] if name[0].isdigit() else name
@@ -13,6 +13,8 @@ import "@/styles/style.css";
 
 type Msg = { role: "user" | "bot" | "system"; text: string };
 
+const PROGRESS_EVENTS = new Set(["turn_started", "model_thinking", "tool_started", "tool_finished"]);
+
 type MarkdownMessageProps = {
   className?: string;
   children: string;
@@ -42,8 +44,12 @@ function App() {
   const [messages, setMessages] = useState<Msg[]>([]);
   const [input, setInput] = useState("");
   const [connected, setConnected] = useState(false);
+  // Latest progress event ("Thinking…", "Calling fetch_gas_mileage…"), cleared by the reply
+  const [status, setStatus] = useState<string | null>(null);
   const socketRef = useRef<WebSocket | null>(null);
   const chatWindowRef = useRef<HTMLDivElement | null>(null);
+  // Partially received multi-frame messages, keyed by message_id
+  const pendingFramesRef = useRef<Map<string, string[]>>(new Map());
 
   const MAX_MESSAGES = 200;
 
@@ -98,8 +104,34 @@ function App() {
         return;
       }
 
+      // Typed progress events: { type, data: { ..., ts_ms } }
+      if (PROGRESS_EVENTS.has(parsed?.type)) {
+        const data = parsed.data ?? {};
+        if (typeof data.ts_ms === "number") {
+          console.debug(`[progress] ${parsed.type} (+${Date.now() - data.ts_ms}ms in transit)`, data);
+        }
+        switch (parsed.type) {
+          case "turn_started":
+          case "model_thinking":
+            setStatus("Thinking…");
+            break;
+          case "tool_started":
+            setStatus(`Calling ${data.tool}…`);
+            break;
+          case "tool_finished": {
+            const secs = ((data.latency_ms ?? 0) / 1000).toFixed(1);
+            const note = data.ok
+              ? `✅ ${data.tool} (${secs}s${data.cache_hit ? ", cached" : ""})`
+              : `⚠️ ${data.tool} failed (${data.error ?? "error"}, ${secs}s)`;
+            appendMessage({ role: "system", text: data.ok && data.summary ? `${note}: ${data.summary}` : note });
+            break;
+          }
+        }
+        return;
+      }
+
       // Adjust this to match your backend payload shape
-      // E.g. Emitter sends: { type: "bedrock_reply", reply: "..." }
+      // E.g. Emitter sends: { type: "bedrock_reply", reply: "...", message_id, seq, final }
       let text: string | null = null;
 
       if (typeof parsed?.reply === "string") {
@@ -108,7 +140,27 @@ function App() {
         text = parsed.message;
       }
 
+      // Large replies arrive as several frames; hold them until the final one
+      if (text !== null && typeof parsed?.message_id === "string" && typeof parsed?.seq === "number") {
+        const pending = pendingFramesRef.current;
+        const parts = pending.get(parsed.message_id) ?? [];
+        parts[parsed.seq] = text;
+        if (parsed.final !== true) {
+          pending.set(parsed.message_id, parts);
+          return;
+        }
+        pending.delete(parsed.message_id);
+        text = parts.join("");
+      }
+
+      // Debug frames are a separate channel: keep them out of the chat
+      if (parsed?.type === "debug") {
+        if (text) console.debug("[debug]", text);
+        return;
+      }
+
       if (text) {
+        setStatus(null);
         appendMessage({ role: "bot", text });
       } else {
         console.warn("WebSocket JSON with no usable text field:", parsed);
@@ -200,6 +252,12 @@ function App() {
           })}
         </div>
 
+        {status && (
+          <div className="text-sm italic text-gray-300 mt-1" aria-live="polite">
+            {status}
+          </div>
+        )}
+
         <div className="flex mt-3 gap-3">
           <input
             className="input flex-1 text-lg"